@@ -3,15 +3,17 @@
 Example showing how to process multiple PDFs in a directory.
 """
 
+import asyncio
 from pathlib import Path
 from engpapersumm import PaperSummarizer
 
 def main():
     # Initialize the summarizer with custom configuration
     custom_config = {
-        "CHUNK_SIZE": 10000,  # Smaller chunks for processing
+        "CHUNK_TOKENS": 2000,  # Smaller chunks for processing
         "MIN_SIMILARITY": 0.2,  # Stricter section filtering
-        "LLM_MODEL": "gpt-4o"  # Specify model to use
+        "LLM_MODEL": "gpt-4o",  # Specify model to use
+        "MAX_CONCURRENT_PAPERS": 8  # Papers processed at the same time (keeps us within API rate limits)
     }
     summarizer = PaperSummarizer(config=custom_config)
     
@@ -22,8 +24,8 @@ def main():
     output_dir = Path("./summaries")
     output_dir.mkdir(exist_ok=True)
     
-    # Process all PDFs in the directory
-    output_files = summarizer.summarize_directory(input_dir, output_dir)
+    # Process all PDFs in the directory concurrently, sharing the summarizer's connection pool
+    output_files = asyncio.run(summarizer.summarize_directory_async(input_dir, output_dir))
     
     # Print output information
     print(f"Processed {len(output_files)} papers:")
@@ -31,4 +33,4 @@ def main():
         print(f"  - {file.name}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1 +1,11 @@
-from .summarizer import PaperSummarizer
\ No newline at end of file
+"""Summarize engineering research papers with LLMs."""
+
+__all__ = ["PaperSummarizer"]
+
+def __getattr__(name):
+    # PaperSummarizer pulls in the OpenAI SDK and scikit-learn; import it on first use so
+    # that importing a submodule (e.g. engpapersumm.utils.tokens) stays cheap
+    if name == "PaperSummarizer":
+        from .summarizer import PaperSummarizer
+        return PaperSummarizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
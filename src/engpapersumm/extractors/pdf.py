@@ -1,26 +1,125 @@
 """PDF extraction utilities for processing research papers."""
 
-import re
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 import PyPDF2
 
+try:
+    import pypdfium2
+except ImportError:  # optional C-backed extractor, PyPDF2 is used otherwise
+    pypdfium2 = None
+
+# Papers with more pages than this are extracted in parallel worker processes (PyPDF2 only)
+PARALLEL_MIN_PAGES = 20
+
+# Leading pages passed to the on_lead callback of extract_text_and_title; the title block and abstract sit on them
+LEAD_PAGES = 2
+
+# PDFium is not thread-safe, so documents are opened and read by one thread at a time
+_PDFIUM_LOCK = threading.Lock()
+
+# Per-process reader used by the extraction workers
+_worker_reader = None
+
 def list_pdfs(path: Path) -> List[Path]:
     """Return all .pdf files under path (if directory) or [path] if file."""
     if path.is_dir():
-        return list(path.glob("*.pdf"))
+        # scandir exposes the entry type from the directory listing, avoiding a stat per file
+        with os.scandir(path) as entries:
+            return [Path(e.path) for e in entries if e.name.lower().endswith(".pdf") and e.is_file()]
     if path.suffix.lower() == ".pdf":
         return [path]
     return []
 
-def extract_text_and_title(pdf_path: Path) -> Tuple[str, str]:
-    """Extract text and title from a PDF file."""
-    reader = PyPDF2.PdfReader(str(pdf_path))
+def pdf_sha256(pdf_path: Path) -> str:
+    """SHA256 of the PDF's bytes, identifying a paper independently of its file name."""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _collapse_whitespace(pages: List[str]) -> str:
+    """Join raw page texts and collapse every whitespace run to one space in a single pass."""
+    return " ".join("\n".join(pages).split())
+
+def _collect_pages(page_texts: Iterable[str], title: str,
+                   on_lead: Optional[Callable[[str, str], None]]) -> str:
+    """Join the page texts, handing the first LEAD_PAGES of them to on_lead as soon as they are read."""
+    pages = []
+    for page_text in page_texts:
+        pages.append(page_text)
+        if on_lead is not None and len(pages) == LEAD_PAGES:
+            on_lead(_collapse_whitespace(pages), title)
+    if on_lead is not None and len(pages) < LEAD_PAGES:
+        on_lead(_collapse_whitespace(pages), title)
+    return _collapse_whitespace(pages)
+
+def _iter_pdfium_pages(pdf) -> Iterator[str]:
+    """Yield raw page texts, releasing each page handle as soon as it is read."""
+    for i in range(len(pdf)):
+        page = pdf[i]
+        textpage = page.get_textpage()
+        try:
+            yield textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+
+def _init_worker(pdf_bytes: bytes):
+    """Parse the PDF once per worker process."""
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+
+def _extract_page(index: int) -> str:
+    """Extract the text of a single page in a worker process."""
+    return _worker_reader.pages[index].extract_text() or ""
+
+def _extract_with_pypdf2(pdf_path: Path, max_workers: Optional[int],
+                         on_lead: Optional[Callable[[str, str], None]]) -> Tuple[str, str]:
+    """Extract text and title with PyPDF2, using a process pool for long papers."""
+    pdf_bytes = pdf_path.read_bytes()
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
     meta = reader.metadata
-    title = meta.title or pdf_path.stem
-    text_chunks = []
-    for page in reader.pages:
-        raw = page.extract_text() or ""
-        cleaned = re.sub(r"\s*\n\s*", " ", raw)  # collapse line breaks
-        text_chunks.append(cleaned)
-    return " ".join(text_chunks), title
\ No newline at end of file
+    title = (meta.title if meta else None) or pdf_path.stem
+    num_pages = len(reader.pages)
+
+    workers = max_workers or os.cpu_count() or 1
+    if num_pages > PARALLEL_MIN_PAGES and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pdf_bytes,)) as executor:
+            # map yields the pages in order, so the lead is handed over once its pages are back
+            text = _collect_pages(executor.map(_extract_page, range(num_pages), chunksize=4), title, on_lead)
+    else:
+        text = _collect_pages((page.extract_text() or "" for page in reader.pages), title, on_lead)
+    return text, title
+
+def extract_text_and_title(pdf_path: Path, max_workers: Optional[int] = None,
+                           on_lead: Optional[Callable[[str, str], None]] = None) -> Tuple[str, str]:
+    """
+    Extract text and title from a PDF file.
+
+    Uses pypdfium2 when it is installed. Otherwise falls back to PyPDF2, whose
+    CPU-bound pure-Python extraction is spread across a process pool of
+    max_workers (defaults to the CPU count) for papers longer than
+    PARALLEL_MIN_PAGES. Pass max_workers=1 to force sequential extraction.
+
+    on_lead, if given, is called with the text of the first LEAD_PAGES pages
+    and the title as soon as they are read, so work that only needs the title
+    and abstract can start before the rest of a long paper is extracted.
+    """
+    if pypdfium2 is None:
+        return _extract_with_pypdf2(pdf_path, max_workers, on_lead)
+
+    with _PDFIUM_LOCK:
+        pdf = pypdfium2.PdfDocument(str(pdf_path))
+        try:
+            title = pdf.get_metadata_dict().get("Title") or pdf_path.stem
+            text = _collect_pages(_iter_pdfium_pages(pdf), title, on_lead)
+        finally:
+            pdf.close()
+    return text, title
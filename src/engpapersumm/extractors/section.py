@@ -1,29 +1,60 @@
 """Utilities for extracting and processing sections from research papers."""
 
 import re
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Pattern, Tuple
+
+from ..utils.tokens import count_tokens, split_by_tokens, truncate_to_tokens
+
+# "Abstract" heading followed by optional punctuation/line breaks, up to the first paragraph break
+_ABSTRACT_RE = re.compile(r'abstract[:.\s]*(?P<body>.*?)(?:\n\s*\n|\n(?:[A-Z]|\d))', re.IGNORECASE | re.DOTALL)
+# Longer abstracts that run until the introduction
+_ABSTRACT_UNTIL_INTRO_RE = re.compile(
+    r'abstract[:\s]*(?P<body>.*?)(?=\n\s*\n\s*(?:introduction|1\.)\s*\n)', re.IGNORECASE | re.DOTALL
+)
+_WS_RE = re.compile(r'\s+')
+# Section title without its numbering and surrounding whitespace
+_SECTION_TITLE_RE = re.compile(r'\s*(?:\d+\.\s*)?(.*?)\s*$', re.DOTALL)
+
+# Sections kept at length in paper excerpts, as they state the contributions
+_CONCLUSION_TITLE_RE = re.compile(r'conclusion|discussion|future work|limitations', re.IGNORECASE)
+# Sections left out of paper excerpts (the abstract is added on its own)
+_EXCLUDED_TITLE_RE = re.compile(r'abstract|references?|bibliography', re.IGNORECASE)
+# Continuation chunks of a section that detect_sections split into parts
+_CONTINUATION_TITLE_RE = re.compile(r'\(Part (?!1\))\d+\)$')
+
+# Tokens of the previous part repeated at the start of each part of a split section
+CHUNK_OVERLAP_TOKENS = 128
+
+# Patterns used by the fallback section detection
+_FALLBACK_ABSTRACT_RE = re.compile(r'abstract(?:\s*\n)(.*?)(?:\n\s*\n|\n(?:[A-Z]|\d))', re.IGNORECASE | re.DOTALL)
+_FALLBACK_INTRO_RE = re.compile(r'(?:^|\n\s*\n)(?:\d\.\s*)?introduction(?:\s*\n)(.*?)(?:\n\s*\n\d|$)', re.IGNORECASE | re.DOTALL)
+
+@lru_cache(maxsize=8)
+def _section_header_pattern(section_patterns: Tuple[str, ...]) -> Pattern:
+    """Compile (once per pattern set) the combined section header regex."""
+    alternatives = '|'.join(section_patterns)
+    return re.compile(
+        r'(?:^|\n\s*\n)(' +
+        r'\d+\.\s*(?:' + alternatives + r')|' +
+        r'(?:' + alternatives + r'))(?:\s*\n)',
+        re.IGNORECASE
+    )
 
 def extract_abstract(text: str) -> str:
     """
     Attempt to extract abstract from paper text.
     Returns abstract text or an empty string if not found.
     """
-    # Try several common abstract patterns
-    abstract_patterns = [
-        r'(?i)abstract\s*\n+(.*?)(?:\n\s*\n|\n(?:[A-Z]|\d))',  # Most common format
-        r'(?i)abstract[:\.\s]+(.*?)(?:\n\s*\n|\n(?:[A-Z]|\d))',  # Abstract with punctuation
-        r'(?i)ABSTRACT\s*(.*?)(?:\n\s*\n|\n(?:[A-Z]|\d))',  # All caps
-        r'(?i)abstract(?:\s*|:\s*)(.*?)(?=\n\s*\n\s*(?:introduction|1\.)\s*\n)',  # Until introduction
-    ]
-    
-    for pattern in abstract_patterns:
-        match = re.search(pattern, text, re.DOTALL)
-        if match:
-            abstract = match.group(1).strip()
-            # Clean up the abstract text
-            abstract = re.sub(r'\s+', ' ', abstract)
-            if len(abstract) > 50:  # Ensure we have a substantial abstract
-                return abstract
+    match = _ABSTRACT_RE.search(text)
+    # Every layout starts with the word "abstract", so a miss here means there is none
+    if match:
+        for candidate in (match, _ABSTRACT_UNTIL_INTRO_RE.search(text)):
+            if candidate:
+                # Clean up the abstract text
+                abstract = _WS_RE.sub(' ', candidate.group('body').strip())
+                if len(abstract) > 50:  # Ensure we have a substantial abstract
+                    return abstract
     
     # If no abstract found, extract the first paragraph as a fallback
     first_para = text.split('\n\n')[0]
@@ -31,96 +62,96 @@ def extract_abstract(text: str) -> str:
         return first_para[:500]  # Limit to 500 chars
     return ""
 
-def detect_sections(text: str, section_patterns: List[str], max_chars: int) -> List[dict]:
+def detect_sections(text: str, section_patterns: List[str], max_tokens: int, model: str) -> List[dict]:
     """
     Identify academic paper sections using regex pattern matching.
-    Returns a list of dictionaries with section title and content.
+    Returns a list of dictionaries with section title and content; sections longer
+    than max_tokens tokens for the given model are split into parts.
     """
     # First, try to find section headers with more specific patterns
     sections = []
     
-    # More specific pattern for section headers
-    combined_pattern = r'(?:^|\n\s*\n)(' + \
-                      r'\d+\.\s*(?:' + '|'.join(section_patterns) + r')|' + \
-                      r'(?:' + '|'.join(section_patterns) + r'))(?:\s*\n)'
+    # More specific pattern for section headers (case-insensitive, cached per pattern set)
+    combined_pattern = _section_header_pattern(tuple(section_patterns))
     
-    # Use case-insensitive search
-    section_matches = list(re.finditer(combined_pattern, text, re.IGNORECASE))
+    def add_section(match, end_pos: int):
+        # Extract the section title - use group 1 or the whole match
+        section_title = match.group(1) if match.group(1) else match.group(0)
+        # Clean up section title: drop numbering and whitespace, then capitalize what is left
+        section_title = _SECTION_TITLE_RE.match(section_title).group(1).capitalize()
+        
+        # Extract content without the section title
+        content = text[match.end():end_pos].strip()
+        
+        if len(content) > 200:  # Only add if there's substantial content
+            sections.append({
+                'title': section_title,
+                'content': content
+            })
     
-    # Filter out matches that appear too close to one another (likely false positives)
-    filtered_matches = []
+    # Single pass over the matches: filter out headers that appear too close to the
+    # previous one (likely false positives); each kept header closes the previous section
+    previous = None
+    header_count = 0
     last_end = 0
     min_section_size = 1000  # Minimum characters between sections
     
-    for match in section_matches:
+    for match in combined_pattern.finditer(text):
         if match.start() - last_end > min_section_size or last_end == 0:
-            filtered_matches.append(match)
+            if previous is not None:
+                add_section(previous, match.start())
+            previous = match
+            header_count += 1
             last_end = match.end()
     
-    # If we found at least 2 genuine sections
-    if len(filtered_matches) >= 2:
-        for i, match in enumerate(filtered_matches):
-            start_pos = match.start()
-            
-            # Extract the section title - use group 1 or the whole match
-            section_title = match.group(1) if match.group(1) else match.group(0)
-            # Clean up section title
-            section_title = re.sub(r'^\d+\.\s*', '', section_title)  # Remove numbering
-            section_title = section_title.strip().capitalize()
-            
-            # Determine end position (either next section or end of text)
-            end_pos = filtered_matches[i+1].start() if i < len(filtered_matches)-1 else len(text)
-            
-            # Extract content without the section title
-            content = text[match.end():end_pos].strip()
-            
-            if len(content) > 200:  # Only add if there's substantial content
-                sections.append({
-                    'title': section_title,
-                    'content': content
-                })
+    # Only trust the headers if we found at least 2 genuine sections (a single header
+    # never closes a section, so nothing has been added yet in that case)
+    if header_count >= 2:
+        add_section(previous, len(text))
     
     # If no meaningful sections found or too few, use a simpler approach
     if len(sections) < 2:
         print("Using fallback section detection (basic structure)...")
         # Try to find abstract
-        abstract_match = re.search(r'(?i)abstract(?:\s*\n)(.*?)(?:\n\s*\n|\n(?:[A-Z]|\d))', text, re.DOTALL)
+        abstract_match = _FALLBACK_ABSTRACT_RE.search(text)
         # Find introduction - one of the most reliable sections
-        intro_match = re.search(r'(?i)(?:^|\n\s*\n)(?:\d\.\s*)?introduction(?:\s*\n)(.*?)(?:\n\s*\n\d|$)', text, re.DOTALL)
+        intro_match = _FALLBACK_INTRO_RE.search(text)
         
         text_len = len(text)
+        # Split points at 25%, 75% and 80% of the text
+        split25 = text_len // 4
+        split75 = (text_len * 3) // 4
+        split80 = (text_len * 8) // 10
         # Determine positions to split the document into meaningful chunks
         if abstract_match and intro_match:
             # We found both abstract and introduction
             sections = [
                 {'title': 'Abstract', 'content': abstract_match.group(1).strip()},
                 {'title': 'Introduction', 'content': intro_match.group(1).strip()},
-                {'title': 'Main Body', 'content': text[intro_match.end():int(text_len*0.8)]},
-                {'title': 'Conclusion', 'content': text[int(text_len*0.8):]}
+                {'title': 'Main Body', 'content': text[intro_match.end():split80]},
+                {'title': 'Conclusion', 'content': text[split80:]}
             ]
         elif intro_match:
             # Only introduction found
             sections = [
                 {'title': 'Introduction', 'content': intro_match.group(1).strip()},
-                {'title': 'Main Body', 'content': text[intro_match.end():int(text_len*0.8)]},
-                {'title': 'Conclusion', 'content': text[int(text_len*0.8):]}
+                {'title': 'Main Body', 'content': text[intro_match.end():split80]},
+                {'title': 'Conclusion', 'content': text[split80:]}
             ]
         else:
             # No clear sections found, split by proportion
             sections = [
-                {'title': 'Introduction', 'content': text[:int(text_len*0.25)]},
-                {'title': 'Methods and Results', 'content': text[int(text_len*0.25):int(text_len*0.75)]},
-                {'title': 'Discussion and Conclusion', 'content': text[int(text_len*0.75):]}
+                {'title': 'Introduction', 'content': text[:split25]},
+                {'title': 'Methods and Results', 'content': text[split25:split75]},
+                {'title': 'Discussion and Conclusion', 'content': text[split75:]}
             ]
     
     # Process detected sections to ensure they're not too large
-    from ..utils.text import chunk_text
-    
     processed_sections = []
     for section in sections:
-        # If section is too large, split it further
-        if len(section['content']) > max_chars:
-            subsections = chunk_text(section['content'], max_chars)
+        # If section is too large, split it further (every token covers at least one character)
+        if len(section['content']) > max_tokens and count_tokens(section['content'], model) > max_tokens:
+            subsections = split_by_tokens(section['content'], max_tokens, model, CHUNK_OVERLAP_TOKENS)
             for i, subsection in enumerate(subsections):
                 processed_sections.append({
                     'title': f"{section['title']} (Part {i+1})",
@@ -130,4 +161,37 @@ def detect_sections(text: str, section_patterns: List[str], max_chars: int) -> L
             processed_sections.append(section)
     
     print(f"Detected {len(processed_sections)} sections after processing")
-    return processed_sections
\ No newline at end of file
+    return processed_sections
+
+def build_paper_excerpt(text: str, sections: List[dict], max_tokens: int, model: str) -> str:
+    """
+    Build a token-budgeted excerpt covering the whole paper.
+    
+    Instead of the first max_tokens of the text, the excerpt holds the abstract,
+    the conclusion-like sections (given half of the remaining budget) and the
+    opening of every other section, in paper order. sections are the paper's
+    sections as returned by detect_sections, which callers already run.
+    """
+    abstract = extract_abstract(text)
+    sections = [s for s in sections if not _EXCLUDED_TITLE_RE.match(s['title'])]
+    conclusions = [i for i, s in enumerate(sections) if _CONCLUSION_TITLE_RE.search(s['title'])]
+    openings = [i for i, s in enumerate(sections)
+                if i not in conclusions and not _CONTINUATION_TITLE_RE.search(s['title'])]
+    if not conclusions and not openings:
+        return truncate_to_tokens(text, max_tokens, model)
+    
+    budget = max(0, max_tokens - count_tokens(abstract, model))
+    if not conclusions:
+        conclusion_budget = 0
+    else:
+        conclusion_budget = budget // 2 if openings else budget
+    limits = {i: conclusion_budget // len(conclusions) for i in conclusions}
+    limits.update({i: (budget - conclusion_budget) // len(openings) for i in openings})
+    
+    parts = [f"Abstract: {abstract}"]
+    for i, section in enumerate(sections):
+        if i in limits:
+            parts.append(f"## {section['title']}\n{truncate_to_tokens(section['content'], limits[i], model)}")
+    # Headings add a few tokens, so cap the assembled excerpt as well
+    return truncate_to_tokens("\n\n".join(parts), max_tokens, model)
+
@@ -1,50 +1,155 @@
 """Functions for creating formatted PDF outputs of paper summaries."""
 
+import html
 import re
+from functools import lru_cache
 from pathlib import Path
+from typing import Tuple
 
 from reportlab.pdfgen.canvas import Canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, PageBreak, Preformatted
+from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, Paragraph, Spacer, PageBreak, Preformatted
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_JUSTIFY
 from reportlab.lib.colors import HexColor
 
+_TAG_RE = re.compile(r'<img[^>]*>|<[^>]*>')
+# Typographic characters the default PDF fonts render poorly
+_CHAR_TRANS = str.maketrans({
+    '\u2018': "'",
+    '\u2019': "'",
+    '\u201c': '"',
+    '\u201d': '"',
+    '\u2014': '-',
+    '\u2013': '-',
+})
+_BULLET_RE = re.compile(r'^(?:[-*•]\s+|\d+\.\s+)')
+
+# One pass over the markdown text; each line is classified by the group that matched it.
+# A trailing \r (CRLF line endings) is stripped from the payloads, and \r-only lines are blank.
+_MD_TOKEN = re.compile(
+    r'(?P<heading>^#+[ \t]+[^\n]*)'
+    r'|(?P<bullet>^[ \t]*(?:[-*•]|\d+\.)[ \t]+[^\n]*)'
+    r'|(?P<indent>^[ \t]+\S[^\n]*)'
+    r'|(?P<blank>^[ \t\r]*$)'
+    r'|(?P<text>^[^\n]+)',
+    re.MULTILINE
+)
+
+def _replace_tag(match) -> str:
+    """Replace images with a placeholder and drop any other tag."""
+    return '[IMAGE]' if match.group().startswith('<img') else ''
+
 def sanitize_text(text):
     """Remove problematic HTML/XML and escape special characters."""
     # Remove HTML/XML tags that might cause issues
-    text = re.sub(r'<img[^>]*>', '[IMAGE]', text)
-    text = re.sub(r'<[^>]*>', '', text)
+    text = _TAG_RE.sub(_replace_tag, text)
     
     # Escape special characters
-    text = text.replace('&', '&amp;')
-    text = text.replace('<', '&lt;')
-    text = text.replace('>', '&gt;')
+    text = html.escape(text, quote=False)
     
     # Replace problematic characters
-    text = text.replace(''', "'")
-    text = text.replace(''', "'")
-    text = text.replace('"', '"')
-    text = text.replace('"', '"')
-    text = text.replace('—', '-')
-    text = text.replace('–', '-')
-    text = text.replace('**', '')
+    text = text.translate(_CHAR_TRANS).replace('**', '')
     
     return text
 
-def write_summary_pdf(output_path: Path, title: str, summary: str, key_takeaways: str, engineers_corner: str):
-    """Write the summary to a PDF with improved formatting and sections."""
-    # Create a document with proper margins
-    doc = SimpleDocTemplate(
-        str(output_path),
-        pagesize=letter,
-        leftMargin=1*inch,
-        rightMargin=1*inch,
-        topMargin=1*inch,
-        bottomMargin=1*inch
-    )
-    
+def _paragraph(text: str, styles: dict, style_name: str):
+    """Build a Paragraph, falling back to preformatted text if reportlab rejects the markup."""
+    try:
+        return Paragraph(text, styles[style_name])
+    except Exception:
+        return Preformatted(text, styles['fallback'])
+
+def _is_pseudo_heading(line: str, heading_prefixes: Tuple[str, ...]) -> bool:
+    """Check whether a plain line acts as a heading: 'Title:', '**Title**' or '<prefix>...: ...'."""
+    # The last character decides the common cases without scanning the line
+    last = line[-1:]
+    if last == ":":
+        return True
+    if last == "*":
+        return line.startswith("**") and line.endswith("**")
+    return bool(heading_prefixes) and line.startswith(heading_prefixes) and ":" in line
+
+def emit_markdown(story: list, text: str, styles: dict, heading_prefixes: Tuple[str, ...] = ()):
+    """
+    Convert LLM-generated markdown into reportlab flowables appended to story.
+    
+    styles maps 'heading', 'subheading', 'body', 'bullet' and 'fallback' to paragraph styles.
+    Plain lines ending with a colon, wrapped in ** or starting with one of heading_prefixes
+    (and containing a colon) are treated as headings.
+    """
+    paragraph = []  # lines of the current paragraph
+    bullets = []  # items of the current bullet list, each a list of its lines
+    in_list = False  # whether the previous line belonged to a bullet item
+    
+    def flush_paragraph(spacer: bool):
+        if paragraph:
+            flowable = _paragraph(sanitize_text(" ".join(paragraph)), styles, 'body')
+            story.extend((flowable, Spacer(1, 0.1*inch)) if spacer else (flowable,))
+            paragraph.clear()
+    
+    def flush_bullets():
+        if bullets:
+            buf = [_paragraph("• " + sanitize_text(" ".join(parts)), styles, 'bullet') for parts in bullets]
+            buf.append(Spacer(1, 0.1*inch))
+            story.extend(buf)
+            bullets.clear()
+    
+    def on_heading(line: str):
+        nonlocal in_list
+        flush_bullets()
+        flush_paragraph(False)
+        level = len(line) - len(line.lstrip("#"))
+        heading_text = sanitize_text(line.lstrip("#").strip())
+        if heading_text.endswith(":"):
+            heading_text = heading_text[:-1]  # Remove trailing colon
+        story.append(_paragraph(heading_text, styles, 'subheading' if level >= 3 else 'heading'))
+        in_list = False
+    
+    def on_bullet(line: str):
+        nonlocal in_list
+        line = line.strip()
+        if _is_pseudo_heading(line, heading_prefixes):
+            # Numbered or dashed subsection titles such as '1. Insights:' are headings, not items
+            on_heading(line)
+            return
+        flush_paragraph(False)
+        bullets.append([_BULLET_RE.sub("", line)])
+        in_list = True
+    
+    def on_text(line: str):
+        line = line.strip()
+        if _is_pseudo_heading(line, heading_prefixes):
+            on_heading(line)
+        elif in_list:
+            # Lazy continuation of the last bullet point
+            bullets[-1].append(line)
+        else:
+            flush_bullets()
+            paragraph.append(line)
+    
+    def on_blank(line: str):
+        nonlocal in_list
+        flush_paragraph(True)
+        in_list = False
+    
+    dispatch = {
+        'heading': on_heading,
+        'bullet': on_bullet,
+        'indent': on_text,
+        'blank': on_blank,
+        'text': on_text,
+    }
+    for match in _MD_TOKEN.finditer(text):
+        dispatch[match.lastgroup](match.group())
+    
+    flush_bullets()
+    flush_paragraph(False)
+
+@lru_cache(maxsize=None)
+def _styles() -> dict:
+    """Build the paragraph styles once; they are never mutated, so every PDF shares them."""
     # Get styles and create custom styles
     styles = getSampleStyleSheet()
     
@@ -133,357 +238,82 @@ def write_summary_pdf(output_path: Path, title: str, summary: str, key_takeaways
         textColor=HexColor('#9B59B6')  # Lighter purple for subsections
     )
     
-    # Build content
-    story = []
+    return {
+        'title': title_style,
+        'heading': heading_style,
+        'subheading': subheading_style,
+        'body': body_style,
+        'bullet': bullet_style,
+        'fallback': styles['Normal'],
+        'engineers_heading': engineers_heading_style,
+        'engineers_subheading': engineers_subheading_style,
+        'takeaways_heading': takeaways_heading_style,
+        'takeaways_subheading': takeaways_subheading_style,
+        # Style maps handed to emit_markdown for the takeaways and Engineer's Corner sections
+        'takeaways_markdown': {
+            'heading': takeaways_subheading_style,
+            'subheading': takeaways_subheading_style,
+            'body': body_style,
+            'bullet': bullet_style,
+            'fallback': styles['Normal'],
+        },
+        'engineers_markdown': {
+            'heading': engineers_subheading_style,
+            'subheading': engineers_subheading_style,
+            'body': body_style,
+            'bullet': bullet_style,
+            'fallback': styles['Normal'],
+        },
+    }
+
+def _emit_takeaways(story: list, key_takeaways: str, styles: dict):
+    """Append the Key Takeaways section."""
+    story.extend([Paragraph("Key Takeaways", styles['takeaways_heading']), Spacer(1, 0.2*inch)])
+    emit_markdown(story, key_takeaways, styles['takeaways_markdown'], heading_prefixes=("Key ",))
+
+def _emit_summary(story: list, summary: str, styles: dict):
+    """Append the Research Summary section."""
+    story.extend([Paragraph("Research Summary", styles['heading']), Spacer(1, 0.2*inch)])
+    emit_markdown(story, summary, styles)
+
+def _emit_engineers(story: list, engineers_corner: str, styles: dict):
+    """Append the Engineer's Corner section."""
+    story.extend([Paragraph("Engineer's Corner", styles['engineers_heading']), Spacer(1, 0.2*inch)])
+    emit_markdown(story, engineers_corner, styles['engineers_markdown'], heading_prefixes=("Practical",))
+
+def write_summary_pdf(output_path: Path, title: str, summary: str, key_takeaways: str, engineers_corner: str):
+    """Write the summary to a PDF with improved formatting and sections."""
+    # Create a document with proper margins and a single full-page frame
+    doc = BaseDocTemplate(
+        str(output_path),
+        pagesize=letter,
+        leftMargin=1*inch,
+        rightMargin=1*inch,
+        topMargin=1*inch,
+        bottomMargin=1*inch
+    )
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal')
+    doc.addPageTemplates([PageTemplate(id='summary', frames=[frame])])
     
-    # Title - sanitize first
-    sanitized_title = sanitize_text(title)
-    story.append(Paragraph(sanitized_title + " — Engineer's Summary", title_style))
-    story.append(Spacer(1, 0.2*inch))
+    # Build content (styles are shared between calls)
+    styles = _styles()
     
-    # Add a brief intro paragraph
+    # Title - sanitize first - followed by a brief intro paragraph
+    sanitized_title = sanitize_text(title)
     intro = "This is an application-focused summary of research paper findings, highlighting practical insights and opportunities for engineers."
-    story.append(Paragraph(intro, body_style))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Add Key Takeaways section
-    story.append(Paragraph("Key Takeaways", takeaways_heading_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Process key takeaways content
-    takeaways_lines = key_takeaways.split("\n")
-    current_section = None
-    current_text = []
-    in_bullet_list = False
-    bullet_items = []
-    
-    for line in takeaways_lines:
-        line = line.strip()
-        
-        if not line:
-            # Empty line - process current content
-            if current_text:
-                # Flush any bullet list first
-                if in_bullet_list and bullet_items:
-                    for bullet in bullet_items:
-                        story.append(Paragraph("• " + bullet, bullet_style))
-                    bullet_items = []
-                    in_bullet_list = False
-                    story.append(Spacer(1, 0.1*inch))
-                
-                # Then add the paragraph
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                    story.append(Spacer(1, 0.1*inch))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                    story.append(Spacer(1, 0.1*inch))
-                current_text = []
-        elif re.match(r"^#+\s+", line) or (line.startswith("Key ") and ":" in line) or line.endswith(":"):
-            # This is a section heading in the key takeaways
-            
-            # Flush any bullet list first
-            if in_bullet_list and bullet_items:
-                for bullet in bullet_items:
-                    story.append(Paragraph("• " + bullet, bullet_style))
-                bullet_items = []
-                in_bullet_list = False
-                story.append(Spacer(1, 0.1*inch))
-            
-            # Add current content as paragraph if any
-            if current_text:
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                current_text = []
-            
-            # Extract heading text
-            heading_text = re.sub(r"^#+\s+", "", line)
-            if heading_text.endswith(":"):
-                heading_text = heading_text[:-1]  # Remove trailing colon
-            
-            # Add the subheading
-            story.append(Paragraph(heading_text, takeaways_subheading_style))
-            current_section = heading_text
-        elif line.startswith("- ") or line.startswith("* ") or line.startswith("• ") or re.match(r"^\d+\.\s+", line):
-            # Process bullet point
-            
-            # Flush current paragraph if any
-            if current_text:
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                current_text = []
-            
-            in_bullet_list = True
-            bullet_text = line
-            # Remove bullet marker
-            bullet_text = re.sub(r"^- ", "", bullet_text)
-            bullet_text = re.sub(r"^\* ", "", bullet_text)
-            bullet_text = re.sub(r"^• ", "", bullet_text)
-            bullet_text = re.sub(r"^\d+\.\s+", "", bullet_text)
-            
-            bullet_items.append(sanitize_text(bullet_text))
-        else:
-            # Regular text - add to current paragraph
-            if in_bullet_list and bullet_items:
-                # If we're in a bullet list, assume this continues the last bullet point
-                bullet_items[-1] += " " + line
-            else:
-                current_text.append(line)
-    
-    # Add any remaining content
-    if in_bullet_list and bullet_items:
-        for bullet in bullet_items:
-            story.append(Paragraph("• " + bullet, bullet_style))
-    
-    if current_text:
-        para_text = sanitize_text(" ".join(current_text))
-        try:
-            story.append(Paragraph(para_text, body_style))
-        except:
-            story.append(Preformatted(para_text, styles['Normal']))
-    
-    # Add a page break before summary
+    story = [
+        Paragraph(sanitized_title + " — Engineer's Summary", styles['title']),
+        Spacer(1, 0.2*inch),
+        Paragraph(intro, styles['body']),
+        Spacer(1, 0.3*inch),
+    ]
+    
+    # One section per page; reportlab pops each flowable off the story as it is laid out
+    _emit_takeaways(story, key_takeaways, styles)
     story.append(PageBreak())
-    
-    # Main Summary section
-    story.append(Paragraph("Research Summary", heading_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Process summary content
-    sections = summary.split("\n")
-    current_text = []
-    in_bullet_list = False
-    bullet_items = []
-    
-    for line in sections:
-        line = line.strip()
-        if not line:
-            # Empty line - add current content as paragraph if any
-            if current_text:
-                # Flush any bullet list first
-                if in_bullet_list and bullet_items:
-                    for bullet in bullet_items:
-                        story.append(Paragraph("• " + bullet, bullet_style))
-                    bullet_items = []
-                    in_bullet_list = False
-                    story.append(Spacer(1, 0.1*inch))
-                
-                # Then add the paragraph
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                    story.append(Spacer(1, 0.1*inch))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                    story.append(Spacer(1, 0.1*inch))
-                current_text = []
-        elif line.startswith("###") or line.startswith("####"):
-            # Flush any bullet list first
-            if in_bullet_list and bullet_items:
-                for bullet in bullet_items:
-                    story.append(Paragraph("• " + bullet, bullet_style))
-                bullet_items = []
-                in_bullet_list = False
-                story.append(Spacer(1, 0.1*inch))
-                
-            # Add current content as paragraph if any
-            if current_text:
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                current_text = []
-            
-            # Add subheading
-            heading_text = sanitize_text(line.replace("###", "").replace("####", "").strip())
-            story.append(Paragraph(heading_text, subheading_style))
-        elif line.startswith("##") or line.startswith("**") and line.endswith("**") or line.endswith(":"):
-            # Flush any bullet list first
-            if in_bullet_list and bullet_items:
-                for bullet in bullet_items:
-                    story.append(Paragraph("• " + bullet, bullet_style))
-                bullet_items = []
-                in_bullet_list = False
-                story.append(Spacer(1, 0.1*inch))
-                
-            # Add current content as paragraph if any
-            if current_text:
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                current_text = []
-            
-            # Add heading
-            heading_text = sanitize_text(line.replace("##", "").replace("**", "").strip())
-            if heading_text.endswith(":"):
-                heading_text = heading_text[:-1]  # Remove trailing colon
-            story.append(Paragraph(heading_text, heading_style))
-        elif line.startswith("- ") or line.startswith("* ") or line.startswith("• ") or re.match(r"^\d+\.\s+", line):
-            # Flush current paragraph if any
-            if current_text:
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                current_text = []
-            
-            # Process bullet point
-            in_bullet_list = True
-            bullet_text = line
-            # Remove bullet marker
-            bullet_text = re.sub(r"^- ", "", bullet_text)
-            bullet_text = re.sub(r"^\* ", "", bullet_text)
-            bullet_text = re.sub(r"^• ", "", bullet_text)
-            bullet_text = re.sub(r"^\d+\.\s+", "", bullet_text)
-            
-            # Handle bold formatting
-            if "**" in bullet_text:
-                bullet_text = bullet_text.replace("**", "<b>", 1)
-                bullet_text = bullet_text.replace("**", "</b>", 1)
-            
-            bullet_items.append(sanitize_text(bullet_text))
-        elif line.startswith("\t") or line.startswith("    "):
-            # This is a continuation of a bullet point
-            if in_bullet_list and bullet_items:
-                # Append to the last bullet point
-                bullet_items[-1] += " " + line.strip()
-            else:
-                # Or treat as regular text
-                current_text.append(line)
-        else:
-            # Regular text - add to current paragraph
-            current_text.append(line)
-    
-    # Add any remaining content
-    if in_bullet_list and bullet_items:
-        for bullet in bullet_items:
-            story.append(Paragraph("• " + bullet, bullet_style))
-        story.append(Spacer(1, 0.1*inch))
-    
-    if current_text:
-        para_text = sanitize_text(" ".join(current_text))
-        try:
-            story.append(Paragraph(para_text, body_style))
-        except:
-            story.append(Preformatted(para_text, styles['Normal']))
-    
-    # Add a page break before Engineer's Corner
+    _emit_summary(story, summary, styles)
     story.append(PageBreak())
-    
-    # Engineer's Corner section
-    story.append(Paragraph("Engineer's Corner", engineers_heading_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Process Engineer's Corner content in a similar manner to Key Takeaways
-    # ...similar processing code for engineers_corner...
-    engineers_lines = engineers_corner.split("\n")
-    current_section = None
-    current_text = []
-    in_bullet_list = False
-    bullet_items = []
-    
-    for line in engineers_lines:
-        line = line.strip()
-        
-        if not line:
-            # Empty line - process current content
-            if current_text:
-                # Flush any bullet list first
-                if in_bullet_list and bullet_items:
-                    for bullet in bullet_items:
-                        story.append(Paragraph("• " + bullet, bullet_style))
-                    bullet_items = []
-                    in_bullet_list = False
-                    story.append(Spacer(1, 0.1*inch))
-                
-                # Then add the paragraph
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                    story.append(Spacer(1, 0.1*inch))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                    story.append(Spacer(1, 0.1*inch))
-                current_text = []
-        elif re.match(r"^#+\s+", line) or (line.startswith("Practical") and ":" in line) or line.endswith(":"):
-            # This is a section heading in the Engineer's Corner
-            
-            # Flush any bullet list first
-            if in_bullet_list and bullet_items:
-                for bullet in bullet_items:
-                    story.append(Paragraph("• " + bullet, bullet_style))
-                bullet_items = []
-                in_bullet_list = False
-                story.append(Spacer(1, 0.1*inch))
-            
-            # Add current content as paragraph if any
-            if current_text:
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                current_text = []
-            
-            # Extract heading text
-            heading_text = re.sub(r"^#+\s+", "", line)
-            if heading_text.endswith(":"):
-                heading_text = heading_text[:-1]  # Remove trailing colon
-            
-            # Add the subheading
-            story.append(Paragraph(heading_text, engineers_subheading_style))
-            current_section = heading_text
-        elif line.startswith("- ") or line.startswith("* ") or line.startswith("• ") or re.match(r"^\d+\.\s+", line):
-            # Process bullet point
-            
-            # Flush current paragraph if any
-            if current_text:
-                para_text = sanitize_text(" ".join(current_text))
-                try:
-                    story.append(Paragraph(para_text, body_style))
-                except:
-                    story.append(Preformatted(para_text, styles['Normal']))
-                current_text = []
-            
-            in_bullet_list = True
-            bullet_text = line
-            # Remove bullet marker
-            bullet_text = re.sub(r"^- ", "", bullet_text)
-            bullet_text = re.sub(r"^\* ", "", bullet_text)
-            bullet_text = re.sub(r"^• ", "", bullet_text)
-            bullet_text = re.sub(r"^\d+\.\s+", "", bullet_text)
-            
-            bullet_items.append(sanitize_text(bullet_text))
-        else:
-            # Regular text - add to current paragraph
-            if in_bullet_list and bullet_items:
-                # If we're in a bullet list, assume this continues the last bullet point
-                bullet_items[-1] += " " + line
-            else:
-                current_text.append(line)
-    
-    # Add any remaining content
-    if in_bullet_list and bullet_items:
-        for bullet in bullet_items:
-            story.append(Paragraph("• " + bullet, bullet_style))
-    
-    if current_text:
-        para_text = sanitize_text(" ".join(current_text))
-        try:
-            story.append(Paragraph(para_text, body_style))
-        except:
-            story.append(Preformatted(para_text, styles['Normal']))
+    _emit_engineers(story, engineers_corner, styles)
     
     # Build the PDF
-    doc.build(story)
\ No newline at end of file
+    doc.build(story)
@@ -1,42 +1,51 @@
 """Functions for generating Engineer's Corner content for research papers."""
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from ..utils.llm import chat_completion, chat_completion_async
 
-def generate_engineers_corner(client: OpenAI, text: str, title: str, model: str) -> str:
-    """Generate an Engineer's Corner section with practical applications and code examples."""
-    # Create a prompt that will generate application-focused content for engineers
-    prompt = f"""Based on the research paper titled '{title}', create an engaging "Engineer's Corner" section that makes this research exciting and actionable.
+_SYSTEM_PROMPT = """You turn research into practical applications for engineers. Write an "Engineer's Corner" section with these headed subsections:
+1. Practical Applications: 3-4 ways engineers can use this research now
+2. Future Possibilities: 2-3 potential future applications
+3. Implementation Insights: tips, pseudo-code or guidance for applying the findings
+4. Tools & Resources: tools, libraries or resources for implementing the ideas
+For each application give the use case, the problem it solves, how to start and its limitations.
+Be technical but accessible, with a forward-looking tone."""
+
+def _build_messages(text: str, title: str) -> list:
+    """Build the chat messages for the Engineer's Corner request."""
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": f"Paper title: {title}\n\nExcerpt:\n\n{text}"}
+    ]
 
-Your response should include these distinct subsections:
-1. Practical Applications: 3-4 specific ways engineers could implement or benefit from this research right now
-2. Future Possibilities: 2-3 exciting potential applications that could be developed in the future
-3. Implementation Insights: Specific tips, pseudo-code, or implementation guidance for engineers wanting to apply these findings
-4. Tools & Resources: Suggested tools, libraries, or resources for implementing these ideas
+def engineers_corner_request(text: str, title: str, model: str) -> dict:
+    """Build the request arguments for the Engineer's Corner section (also used for Batch API jobs)."""
+    return {
+        "model": model,
+        "messages": _build_messages(text, title),
+        "temperature": 0.4,
+        "max_tokens": 2000
+    }
 
-For each application, include:
-- A clear, specific use case
-- Why it matters/what problem it solves
-- How engineers could start implementing it
-- Any potential challenges or limitations
+def generate_engineers_corner(client: OpenAI, text: str, title: str, model: str) -> str:
+    """
+    Generate an Engineer's Corner section with practical applications and code examples.
+    text is a token-budgeted excerpt of the paper, see extractors.section.build_paper_excerpt.
+    """
+    try:
+        response = chat_completion(client, **engineers_corner_request(text, title, model))
+        
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Error generating Engineer's Corner: {e}")
+        return "Error generating Engineer's Corner section."
 
-Make this technical but accessible, focusing on the "so what" factor for engineers. Use an excited, forward-looking tone that makes readers want to experiment with these ideas.
-"""
-    
-    # Use a shorter excerpt of the text to avoid token limits
-    text_sample = text[:50000]  # Use first ~50k chars
-    
+async def generate_engineers_corner_async(client: AsyncOpenAI, text: str, title: str, model: str) -> str:
+    """Async variant of generate_engineers_corner for use with a shared AsyncOpenAI client."""
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an engineering consultant who specializes in translating academic research into practical applications."},
-                {"role": "user", "content": prompt + "\n\nHere is an excerpt of the paper:\n\n" + text_sample}
-            ],
-            temperature=0.4,
-            max_tokens=2000
-        )
+        response = await chat_completion_async(client, **engineers_corner_request(text, title, model))
         
         return response.choices[0].message.content.strip()
     except Exception as e:
         print(f"Error generating Engineer's Corner: {e}")
-        return "Error generating Engineer's Corner section."
\ No newline at end of file
+        return "Error generating Engineer's Corner section."
@@ -1,46 +1,50 @@
 """Functions for generating hierarchical summaries of research paper sections."""
 
-from typing import List, Dict
-from openai import OpenAI
+import asyncio
+import json
+from typing import List, Dict, Optional
+from openai import AsyncOpenAI, OpenAI
+from ..utils.llm import (
+    chat_completion, chat_completion_async, stream_chat_completion, stream_chat_completion_async
+)
 
-def map_summarize_section(client: OpenAI, section: dict, model: str) -> dict:
-    """
-    (Map Phase) Summarize a single section while emphasizing practical applications and insights.
-    Returns the section title and its summarized content.
-    """
+# Static instructions go in the system prompt so repeated requests share a cacheable prefix
+_MAP_SYSTEM_PROMPT = """Summarize one section of a research paper for engineers.
+1. Lead with the most surprising findings and results; keep methodology brief.
+2. Stress practical applications and real-world impact, with concrete examples.
+3. Keep technical terms, explained in plain language.
+4. Be engaging; never open with phrases like "This section discusses"."""
+
+def _map_messages(section: dict) -> list:
+    """Build the chat messages for summarizing a single section."""
     # Add topic guidance if available
     topic_guidance = section.get('topic_guidance', '')
     if topic_guidance:
-        topic_instruction = f"\n\n{topic_guidance}"
+        topic_instruction = f"\n{topic_guidance}"
     else:
         topic_instruction = ""
     
-    # Modify the prompt to focus on exciting and practical aspects
-    prompt = f"""Produce an engaging and insight-focused summary of this '{section['title']}' section from a research paper.
-Your summary must:
-1. Focus on what an engineer would find most interesting and useful
-2. Prioritize practical applications, real-world impact, and actionable insights
-3. Explain why this matters and how it could be used in practical engineering contexts
-4. Keep technical terms but explain them in plain language where needed
-5. Highlight the key findings and innovations, not just the methodology
-6. Include concrete examples of how this research could be applied
-7. Only briefly mention methodology - focus more on results and applications{topic_instruction}
-
-Use an engaging style that makes the reader excited about the possibilities. Begin directly with the most interesting or surprising aspects, not with phrases like "This section discusses".
-"""
-    
+    return [
+        {"role": "system", "content": _MAP_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Section: {section['title']}{topic_instruction}\n\n{section['content']}"}
+    ]
+
+def map_section_request(section: dict, model: str) -> dict:
+    """Build the request arguments for summarizing a single section (also used for Batch API jobs)."""
+    return {
+        "model": model,
+        "messages": _map_messages(section),
+        "temperature": 0.3,
+        "max_tokens": 2500
+    }
+
+def map_summarize_section(client: OpenAI, section: dict, model: str) -> dict:
+    """
+    (Map Phase) Summarize a single section while emphasizing practical applications and insights.
+    Returns the section title and its summarized content.
+    """
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": section['content']}
-            ],
-            temperature=0.3,
-            max_tokens=2500
-        )
-        
-        summarized_content = response.choices[0].message.content.strip()
+        summarized_content = stream_chat_completion(client, **map_section_request(section, model)).strip()
         return {
             'title': section['title'],
             'content': summarized_content
@@ -52,42 +56,128 @@ Use an engaging style that makes the reader excited about the possibilities. Beg
             'content': f"Error generating summary: {e}"
         }
 
+async def map_summarize_section_async(client: AsyncOpenAI, section: dict, model: str,
+                                      semaphore: Optional[asyncio.Semaphore] = None) -> dict:
+    """
+    Async variant of map_summarize_section so sections can be summarized concurrently.
+    An optional semaphore bounds the number of requests in flight.
+    """
+    # A private semaphore leaves this call unbounded
+    semaphore = semaphore or asyncio.Semaphore()
+    try:
+        async with semaphore:
+            summarized_content = await stream_chat_completion_async(client, **map_section_request(section, model))
+        summarized_content = summarized_content.strip()
+        return {
+            'title': section['title'],
+            'content': summarized_content
+        }
+    except Exception as e:
+        print(f"Error summarizing section '{section['title']}': {e}")
+        return {
+            'title': section['title'],
+            'content': f"Error generating summary: {e}"
+        }
+
+_BATCH_SYSTEM_PROMPT = _MAP_SYSTEM_PROMPT + """
+You receive several sections as a JSON array. Summarize each one separately and reply with JSON
+{"summaries": [{"title": ..., "content": ...}, ...]} holding one entry per section, in the same order."""
+
+# Output budget per section in a batched request, capped by the model's output limit
+_BATCH_TOKENS_PER_SECTION = 2500
+_MAX_OUTPUT_TOKENS = 16_000
+
+def _batch_messages(sections: List[dict]) -> list:
+    """Build the chat messages for summarizing several sections in one request."""
+    # Topic guidance is shared by all sections, so it is sent once
+    topic_guidance = sections[0].get('topic_guidance', '') if sections else ''
+    payload = json.dumps([{"title": s['title'], "content": s['content']} for s in sections])
+    return [
+        {"role": "system", "content": _BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": f"{topic_guidance}\n\n{payload}" if topic_guidance else payload}
+    ]
+
+def _batch_request(sections: List[dict], model: str) -> dict:
+    """Build the request arguments for a batched map call."""
+    return {
+        "model": model,
+        "messages": _batch_messages(sections),
+        "temperature": 0.3,
+        "max_tokens": min(_BATCH_TOKENS_PER_SECTION * len(sections), _MAX_OUTPUT_TOKENS),
+        "response_format": {"type": "json_object"}
+    }
+
+def _parse_batch(response, sections: List[dict]) -> List[dict]:
+    """Pair the batched summaries with their sections; raises ValueError if any are missing."""
+    summaries = json.loads(response.choices[0].message.content)["summaries"]
+    if len(summaries) != len(sections):
+        raise ValueError(f"expected {len(sections)} summaries, got {len(summaries)}")
+    return [
+        {'title': section['title'], 'content': summary['content'].strip()}
+        for section, summary in zip(sections, summaries)
+    ]
+
+def batch_summarize_sections(client: OpenAI, sections: List[dict], model: str) -> List[dict]:
+    """
+    (Map Phase) Summarize several sections with a single structured-output request.
+    Returns one summary per section, in order. Unlike map_summarize_section, errors are
+    raised so the caller can fall back to summarizing the sections one by one.
+    """
+    return _parse_batch(chat_completion(client, **_batch_request(sections, model)), sections)
+
+async def batch_summarize_sections_async(client: AsyncOpenAI, sections: List[dict], model: str) -> List[dict]:
+    """Async variant of batch_summarize_sections."""
+    return _parse_batch(await chat_completion_async(client, **_batch_request(sections, model)), sections)
+
+_REDUCE_SYSTEM_PROMPT = """Synthesize these section summaries into one engaging document for engineers.
+1. Keep the section structure and connect the sections into one story.
+2. Highlight practical applications, real-world impact and what engineers can do with the research.
+3. Explain numbers and technical details by why they matter; define acronyms.
+4. Use concrete examples and analogies."""
+
+def _reduce_messages(section_summaries: List[dict]) -> list:
+    """Build the chat messages for fusing the section summaries."""
+    # Concatenate all section summaries with their titles
+    all_summaries = "".join(
+        f"## {section['title']}\n\n{section['content']}\n\n" for section in section_summaries
+    )
+    
+    return [
+        {"role": "system", "content": _REDUCE_SYSTEM_PROMPT},
+        {"role": "user", "content": all_summaries}
+    ]
+
 def reduce_summarize(client: OpenAI, section_summaries: List[dict], model: str) -> str:
     """
     (Reduce Phase) Fuse the individual section summaries into a coherent whole.
     Focuses on practical applications and excitement about the research.
     """
-    # Concatenate all section summaries with their titles
-    all_summaries = ""
-    for section in section_summaries:
-        all_summaries += f"## {section['title']}\n\n{section['content']}\n\n"
-    
-    prompt = """Synthesize these research paper section summaries into an engaging, application-focused document.
-Your synthesis must:
-1. Make this research exciting and relevant to engineers
-2. Preserve the original section structure but focus on the most interesting parts
-3. Highlight practical applications and real-world impact throughout
-4. Connect the dots between sections to tell a compelling story
-5. Ensure numerical data and technical details are explained in context of why they matter
-6. Use concrete examples and analogies to make concepts accessible
-7. Define acronyms and technical terms in plain language
-8. Focus on what engineers can DO with this research
-
-This is for engineers who care about applications more than academic details. Use an engaging style with clear explanations of why this research matters.
-"""
-    
     try:
-        response = client.chat.completions.create(
+        summary = stream_chat_completion(
+            client,
+            model=model,
+            messages=_reduce_messages(section_summaries),
+            temperature=0.3,
+            max_tokens=4000
+        )
+        
+        return summary.strip()
+    except Exception as e:
+        print(f"Error in reduce summarization phase: {e}")
+        return "Error generating final summary."
+
+async def reduce_summarize_async(client: AsyncOpenAI, section_summaries: List[dict], model: str) -> str:
+    """Async variant of reduce_summarize for use with a shared AsyncOpenAI client."""
+    try:
+        summary = await stream_chat_completion_async(
+            client,
             model=model,
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": all_summaries}
-            ],
+            messages=_reduce_messages(section_summaries),
             temperature=0.3,
             max_tokens=4000
         )
         
-        return response.choices[0].message.content.strip()
+        return summary.strip()
     except Exception as e:
         print(f"Error in reduce summarization phase: {e}")
-        return "Error generating final summary."
\ No newline at end of file
+        return "Error generating final summary."
@@ -1,36 +1,50 @@
 """Functions for generating key takeaways from research papers."""
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from ..utils.llm import chat_completion, chat_completion_async
 
-def generate_key_takeaways(client: OpenAI, text: str, title: str, model: str) -> str:
-    """Generate a structured Key Takeaways section to enhance reader understanding."""
-    # Create a prompt that will generate well-structured key takeaways
-    prompt = f"""Based on the research paper titled '{title}', create an exciting "Key Takeaways" section that highlights what makes this research valuable and interesting.
+_SYSTEM_PROMPT = """You translate research into exciting insights for engineers. Write a "Key Takeaways" section with these headed subsections of concise bullet points:
+1. Breakthrough Insights: the 3-4 most surprising or innovative aspects
+2. Why It Matters: how it could change engineering practice or solve real problems
+3. What's New: the innovations or improvements over previous approaches
+4. Bottom Line: one paragraph an engineer should remember
+Use plain language; focus on possibilities, not academic detail."""
+
+def _build_messages(text: str, title: str) -> list:
+    """Build the chat messages for the Key Takeaways request."""
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": f"Paper title: {title}\n\nExcerpt:\n\n{text}"}
+    ]
+
+def key_takeaways_request(text: str, title: str, model: str) -> dict:
+    """Build the request arguments for the Key Takeaways section (also used for Batch API jobs)."""
+    return {
+        "model": model,
+        "messages": _build_messages(text, title),
+        "temperature": 0.3,
+        "max_tokens": 1500
+    }
 
-Your response should be formatted with these clear subsections:
-1. Breakthrough Insights: The 3-4 most surprising or innovative aspects of this research
-2. Why It Matters: How this research could change engineering practices or solve real problems
-3. What's New: The specific innovations or improvements over previous approaches
-4. Bottom Line: A one-paragraph summary of what an engineer should remember about this paper
+def generate_key_takeaways(client: OpenAI, text: str, title: str, model: str) -> str:
+    """
+    Generate a structured Key Takeaways section to enhance reader understanding.
+    text is a token-budgeted excerpt of the paper, see extractors.section.build_paper_excerpt.
+    """
+    try:
+        response = chat_completion(client, **key_takeaways_request(text, title, model))
+        
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Error generating Key Takeaways: {e}")
+        return "Error generating Key Takeaways section."
 
-Format each subsection with clear headings and concise bullet points. Use plain language and focus on the exciting possibilities rather than academic details.
-"""
-    
-    # Use a shorter excerpt of the text to avoid token limits
-    text_sample = text[:50000]  # Use first ~50k chars
-    
+async def generate_key_takeaways_async(client: AsyncOpenAI, text: str, title: str, model: str) -> str:
+    """Async variant of generate_key_takeaways for use with a shared AsyncOpenAI client."""
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an expert at translating technical research into exciting insights for engineers."},
-                {"role": "user", "content": prompt + "\n\nHere is an excerpt of the paper:\n\n" + text_sample}
-            ],
-            temperature=0.3,
-            max_tokens=1500
-        )
+        response = await chat_completion_async(client, **key_takeaways_request(text, title, model))
         
         return response.choices[0].message.content.strip()
     except Exception as e:
         print(f"Error generating Key Takeaways: {e}")
-        return "Error generating Key Takeaways section."
\ No newline at end of file
+        return "Error generating Key Takeaways section."
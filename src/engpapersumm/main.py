@@ -4,6 +4,7 @@ Command-line interface for the Engineering Paper Summarizer library.
 """
 
 import argparse
+import asyncio
 from pathlib import Path
 from . import PaperSummarizer
 
@@ -19,21 +20,44 @@ def main():
                        help="Minimum similarity threshold for topic filtering (0-1)")
     parser.add_argument("--model", type=str, default="gpt-4o",
                        help="OpenAI model to use for summarization")
+    parser.add_argument("--scoring-model", type=str, default="gpt-4o-mini",
+                       help="OpenAI model to use for topic extraction and relevance scoring")
+    parser.add_argument("--concurrency", type=int, default=4,
+                       help="Number of papers summarized at the same time with --input-dir")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                       help="Directory caching LLM responses so reruns skip repeated requests "
+                            "(default: ~/.cache/engpapersumm)")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Do not read or write cached LLM responses")
+    parser.add_argument("--batch", action="store_true",
+                       help="Summarize --input-dir through the OpenAI Batch API (half price, may take up to 24h)")
     args = parser.parse_args()
+    if args.batch and not args.input_dir:
+        parser.error("--batch requires --input-dir")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
 
     # Create configuration
     config = {
         "MIN_SIMILARITY": args.min_similarity,
-        "LLM_MODEL": args.model
+        "LLM_MODEL": args.model,
+        "SCORING_MODEL": args.scoring_model,
+        "MAX_CONCURRENT_PAPERS": args.concurrency
     }
+    if args.no_cache:
+        config["CACHE_DIR"] = None
+    elif args.cache_dir:
+        config["CACHE_DIR"] = args.cache_dir
     
     # Create summarizer
     summarizer = PaperSummarizer(config)
     
     if args.pdf:
         summarizer.summarize_file(args.pdf, args.out_dir)
+    elif args.batch:
+        summarizer.summarize_directory_batch(args.input_dir, args.out_dir)
     elif args.input_dir:
-        summarizer.summarize_directory(args.input_dir, args.out_dir)
+        asyncio.run(summarizer.summarize_directory_async(args.input_dir, args.out_dir))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
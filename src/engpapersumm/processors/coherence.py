@@ -1,16 +1,59 @@
 """Functions for ensuring coherence between paper sections."""
 
+import re
 from typing import List
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+# Sections at least this similar are treated as duplicates and merged
+DUPLICATE_SIMILARITY = 0.9
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+def _duplicate_groups(similarities: np.ndarray) -> List[List[int]]:
+    """
+    Group section indices connected by a duplicate-level similarity (union-find).
+    Groups are ordered by, and each group starts with, its first section.
+    """
+    parent = list(range(len(similarities)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for i, j in zip(*np.nonzero(np.triu(similarities > DUPLICATE_SIMILARITY, k=1))):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    
+    groups = {}
+    for i in range(len(similarities)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+def _merge_sections(group: List[dict]) -> dict:
+    """Merge duplicate sections into the first, appending only sentences it does not already contain."""
+    merged = dict(group[0])
+    sentences = _SENTENCE_END_RE.split(merged['content'])
+    seen = set(sentences)
+    for section in group[1:]:
+        for sentence in _SENTENCE_END_RE.split(section['content']):
+            if sentence not in seen:
+                seen.add(sentence)
+                sentences.append(sentence)
+    merged['content'] = " ".join(sentences)
+    return merged
 
 def ensure_content_coherence(sections: List[dict]) -> List[dict]:
     """
     Ensure coherence between sections by using text similarity.
-    Removes outlier sections that don't match the overall content theme.
+    Merges near-duplicate sections, so each is summarized once, and removes
+    outlier sections that don't match the overall content theme.
     """
-    if len(sections) <= 2:
-        return sections  # Need more than 2 sections to detect outliers
+    if len(sections) < 2:
+        return sections
     
     # Create combined text for each section
     section_texts = [section['content'] for section in sections]
@@ -20,32 +63,39 @@ def ensure_content_coherence(sections: List[dict]) -> List[dict]:
     try:
         tfidf_matrix = vectorizer.fit_transform(section_texts)
         
+        # TF-IDF rows are L2-normalized, so one sparse product gives every pairwise cosine similarity
+        similarities = (tfidf_matrix @ tfidf_matrix.T).toarray()
+        
+        # Merge near-duplicate sections, keeping the similarities of the first of each group
+        groups = _duplicate_groups(similarities)
+        if len(groups) < len(sections):
+            for group in groups:
+                if len(group) > 1:
+                    print(f"Merging duplicate sections: {', '.join(repr(sections[i]['title']) for i in group)}")
+            first_indices = [group[0] for group in groups]
+            similarities = similarities[np.ix_(first_indices, first_indices)]
+            sections = [_merge_sections([sections[i] for i in group]) for group in groups]
+        
+        if len(sections) <= 2:
+            return sections  # Need more than 2 sections to detect outliers
+        np.fill_diagonal(similarities, 0)
+        mean_similarities = similarities.sum(axis=1) / (len(sections) - 1)
+        
         # Calculate mean similarity of each section to all other sections
-        section_scores = []
-        for i in range(len(sections)):
-            other_indices = [j for j in range(len(sections)) if j != i]
-            similarities = [
-                cosine_similarity(tfidf_matrix[i:i+1], tfidf_matrix[j:j+1])[0][0]
-                for j in other_indices
-            ]
-            mean_similarity = sum(similarities) / len(similarities) if similarities else 0
-            section_scores.append((i, mean_similarity))
-            print(f"Section '{sections[i]['title']}' - Mean Similarity to Others: {mean_similarity:.3f}")
+        for section, mean_similarity in zip(sections, mean_similarities):
+            print(f"Section '{section['title']}' - Mean Similarity to Others: {mean_similarity:.3f}")
         
         # Identify potential outliers (sections with much lower similarity)
-        sorted_scores = sorted(section_scores, key=lambda x: x[1])
-        if len(sorted_scores) >= 3:
-            lowest_score = sorted_scores[0][1]
-            second_lowest = sorted_scores[1][1]
+        order = np.argsort(mean_similarities, kind='stable')
+        outlier_index = order[0]
+        lowest_score, second_lowest = mean_similarities[order[0]], mean_similarities[order[1]]
+        
+        # If the lowest score is significantly lower than others, it may be an outlier
+        if lowest_score < 0.3 * second_lowest:
+            print(f"Detected outlier section: '{sections[outlier_index]['title']}' with similarity {lowest_score:.3f}")
             
-            # If the lowest score is significantly lower than others, it may be an outlier
-            if lowest_score < 0.3 * second_lowest:
-                outlier_index = sorted_scores[0][0]
-                print(f"Detected outlier section: '{sections[outlier_index]['title']}' with similarity {lowest_score:.3f}")
-                
-                # Remove the outlier
-                coherent_sections = [sections[i] for i in range(len(sections)) if i != outlier_index]
-                return coherent_sections
+            # Remove the outlier
+            return sections[:outlier_index] + sections[outlier_index + 1:]
     
     except Exception as e:
         print(f"Error in coherence analysis: {e}")
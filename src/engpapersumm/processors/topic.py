@@ -1,69 +1,114 @@
 """Topic extraction and similarity computation functions."""
 
+import json
 from typing import Dict, List, Any
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from ..utils.llm import chat_completion, chat_completion_async
+from ..utils.tokens import truncate_to_tokens
 
-def extract_paper_topic(client: OpenAI, title: str, abstract: str, model: str) -> Dict[str, float]:
-    """
-    Extract main topics and keywords from the paper title and abstract.
-    Returns a dictionary of important terms and their weights.
-    """
+# Tokens of the abstract sent for topic extraction
+ABSTRACT_TOKENS = 400
+
+def _topic_messages(title: str, abstract: str, model: str) -> list:
+    """Build the chat messages for extracting topics from the title and abstract."""
     prompt = f"""Analyze this research paper title and abstract to extract the main topics and relevant keywords.
 Title: {title}
-Abstract: {abstract[:2000]}  # Limit abstract length
+Abstract: {truncate_to_tokens(abstract, ABSTRACT_TOKENS, model)}
 
 List the top 10-15 most important topics and technical terms that define what this paper is about.
 For each term, assign a relevance score from 0.0 to 1.0 where 1.0 is highest relevance.
 Format the response as a JSON dictionary with terms as keys and scores as values.
 """
     
+    return [
+        {"role": "system", "content": "You are a research paper analysis system that extracts key topics and terms."},
+        {"role": "user", "content": prompt}
+    ]
+
+def extract_paper_topic(client: OpenAI, title: str, abstract: str, model: str) -> Dict[str, float]:
+    """
+    Extract main topics and keywords from the paper title and abstract.
+    Returns a dictionary of important terms and their weights.
+    """
     try:
-        response = client.chat.completions.create(
+        response = chat_completion(
+            client,
             model=model,
-            messages=[
-                {"role": "system", "content": "You are a research paper analysis system that extracts key topics and terms."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=_topic_messages(title, abstract, model),
             temperature=0.2,
             response_format={"type": "json_object"}
         )
         
         # Parse the JSON response
         topics_json = response.choices[0].message.content.strip()
-        topics_dict = eval(topics_json)  # Convert string to dictionary
+        topics_dict = json.loads(topics_json)  # Convert string to dictionary
         return topics_dict
     except Exception as e:
         print(f"Error parsing topic extraction response: {e}")
         # Return a basic dictionary with the title as the main topic
         return {title.lower(): 1.0}
 
-def compute_topic_similarity(topic_dict: Dict[str, float], text: str) -> float:
+async def extract_paper_topic_async(client: AsyncOpenAI, title: str, abstract: str, model: str) -> Dict[str, float]:
+    """Async variant of extract_paper_topic for use with a shared AsyncOpenAI client."""
+    try:
+        response = await chat_completion_async(
+            client,
+            model=model,
+            messages=_topic_messages(title, abstract, model),
+            temperature=0.2,
+            response_format={"type": "json_object"}
+        )
+        
+        # Parse the JSON response
+        topics_json = response.choices[0].message.content.strip()
+        topics_dict = json.loads(topics_json)  # Convert string to dictionary
+        return topics_dict
+    except Exception as e:
+        print(f"Error parsing topic extraction response: {e}")
+        # Return a basic dictionary with the title as the main topic
+        return {title.lower(): 1.0}
+
+def compute_text_similarities(query: str, texts: List[str]) -> List[float]:
     """
-    Compute similarity between a text and the main topics of the paper.
-    Returns a score from 0 to 1 indicating relevance to the paper's main topics.
+    Compute the TF-IDF cosine similarity of each text to a query text.
+    The vectorizer is fitted once over the query and all texts, and every score
+    comes from a single sparse matrix product.
+    Returns one score from 0 to 1 per text.
     """
-    # Convert topics to a weighted string, repeating important terms
-    topic_text = " ".join([term.lower() * max(1, int(score * 10)) for term, score in topic_dict.items()])
-    
     # Create TF-IDF vectors
     vectorizer = TfidfVectorizer(stop_words='english')
     try:
-        # Handle empty text
-        if not text or not topic_text:
-            return 0.0
+        # Handle an empty query; empty texts get zero vectors and therefore zero similarity
+        if not query or not texts:
+            return [0.0] * len(texts)
             
         # Compute TF-IDF vectors
-        tfidf_matrix = vectorizer.fit_transform([topic_text, text.lower()])
+        tfidf_matrix = vectorizer.fit_transform([query.lower()] + [text.lower() for text in texts])
         
-        # Compute cosine similarity
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        return float(similarity)
+        # Rows are L2-normalized, so the dot products are the cosine similarities
+        similarities = (tfidf_matrix[0] @ tfidf_matrix[1:].T).toarray().ravel()
+        return [float(similarity) for similarity in similarities]
     except Exception as e:
         print(f"Error computing similarity: {e}")
-        return 0.0
+        return [0.0] * len(texts)
+
+def compute_topic_similarities(topic_dict: Dict[str, float], texts: List[str]) -> List[float]:
+    """
+    Compute the similarity of each text to the main topics of the paper.
+    Returns one score from 0 to 1 per text.
+    """
+    # Convert topics to a weighted string, repeating important terms
+    topic_text = " ".join([term.lower() * max(1, int(score * 10)) for term, score in topic_dict.items()])
+    return compute_text_similarities(topic_text, texts)
+
+def compute_topic_similarity(topic_dict: Dict[str, float], text: str) -> float:
+    """
+    Compute similarity between a text and the main topics of the paper.
+    Returns a score from 0 to 1 indicating relevance to the paper's main topics.
+    """
+    return compute_topic_similarities(topic_dict, [text])[0]
 
 def filter_irrelevant_sections(sections: List[dict], topic_dict: Dict[str, float], 
                              similarity_threshold: float) -> List[dict]:
@@ -72,9 +117,9 @@ def filter_irrelevant_sections(sections: List[dict], topic_dict: Dict[str, float
     Returns a list of sections that pass the relevance threshold.
     """
     relevant_sections = []
+    similarities = compute_topic_similarities(topic_dict, [section['content'] for section in sections])
     
-    for section in sections:
-        similarity = compute_topic_similarity(topic_dict, section['content'])
+    for section, similarity in zip(sections, similarities):
         section['topic_similarity'] = similarity
         
         # Keep sections above the similarity threshold
@@ -1,63 +1,133 @@
 """Functions for validating and modeling section content."""
 
-from typing import List, Dict, Any
-from openai import OpenAI
+import asyncio
+import json
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+from openai import AsyncOpenAI, OpenAI
+from ..utils.llm import chat_completion, chat_completion_async
+from ..utils.tokens import single_token_ids, truncate_to_tokens
+from .topic import compute_text_similarities
 import re
 
-def validate_content_against_title(client: OpenAI, title: str, sections: List[dict], model: str) -> List[dict]:
-    """
-    Validate each section's relevance to the paper's title.
-    Returns sections that are relevant to the title.
-    """
-    validated_sections = []
+# TF-IDF similarity to the title and abstract above which a section is accepted without an LLM call
+AUTO_ACCEPT_SIMILARITY = 0.5
+# Similarity below which a section is rejected without an LLM call
+AUTO_REJECT_SIMILARITY = 0.1
+# Relevance scores assigned to sections decided by the prefilter
+_AUTO_ACCEPT_SCORE = 9.0
+_AUTO_REJECT_SCORE = 2.0
+
+# Tokens of section content shown when scoring its relevance
+SECTION_SAMPLE_TOKENS = 250
+# Tokens of combined section text sent for topic modeling
+TOPIC_MODELING_TOKENS = 6000
+
+# Relevance is scored as a single digit so the reply fits in one token
+_SCORE_DIGITS = [str(digit) for digit in range(10)]
+# Minimum relevance score (0-9) for a section to be kept
+MIN_TITLE_RELEVANCE = 6
+
+_VALIDATION_SYSTEM_PROMPT = "You assess the relevance of research paper sections to the paper's title."
+
+def _validation_messages(title: str, section: dict, model: str) -> list:
+    """Build the chat messages asking for a section's relevance score."""
+    # Prepare a sample of the section content
+    content_sample = truncate_to_tokens(section['content'], SECTION_SAMPLE_TOKENS, model)
     
-    for section in sections:
-        # Prepare a sample of the section content (first 1000 chars)
-        content_sample = section['content'][:1000]
-        
-        prompt = f"""Paper Title: {title}
+    prompt = f"""Paper Title: {title}
 Section Title: {section['title']}
 Section Content Sample: {content_sample}
 
-On a scale of 0 to 10, how relevant is this section content to the paper title?
+On a scale of 0 to 9, how relevant is this section content to the paper title?
 Consider:
 1. Direct topical relevance
 2. Expected content for a section with this title in a paper about this topic
 3. Use of terminology consistent with the paper title
 
-Return ONLY a number from 0 to 10 representing the relevance score.
+Return ONLY a single digit from 0 to 9 representing the relevance score.
 """
+    return [
+        {"role": "system", "content": _VALIDATION_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+@lru_cache(maxsize=4)
+def _score_logit_bias(model: str) -> Optional[Dict[str, int]]:
+    """Logit bias restricting the reply to a score digit, or None if the digit tokens are unknown."""
+    digit_ids = single_token_ids(_SCORE_DIGITS, model)
+    if digit_ids is None:
+        return None
+    return {str(token_id): 100 for token_id in digit_ids}
+
+def _validation_request(title: str, section: dict, model: str) -> dict:
+    """Build the request arguments for scoring one section: a single forced digit token."""
+    request = {
+        "model": model,
+        "messages": _validation_messages(title, section, model),
+        "temperature": 0.1,
+        "max_tokens": 1
+    }
+    logit_bias = _score_logit_bias(model)
+    if logit_bias:
+        request["logit_bias"] = logit_bias
+    return request
+
+def _prefilter_scores(title: str, abstract: str, sections: List[dict]) -> List[Optional[float]]:
+    """
+    Score the sections that are clearly relevant or irrelevant locally.
+    Compares each section with the title and abstract by TF-IDF similarity; returns
+    a relevance score per decided section and None for those the LLM must judge.
+    Without an abstract the title alone is too short to decide on, so nothing is prefiltered.
+    """
+    if not abstract:
+        return [None] * len(sections)
+    
+    similarities = compute_text_similarities(f"{title} {abstract}", [section['content'] for section in sections])
+    scores = []
+    for similarity in similarities:
+        if similarity > AUTO_ACCEPT_SIMILARITY:
+            scores.append(_AUTO_ACCEPT_SCORE)
+        elif similarity < AUTO_REJECT_SIMILARITY:
+            scores.append(_AUTO_REJECT_SCORE)
+        else:
+            scores.append(None)
+    return scores
+
+def _select_relevant_sections(sections: List[dict], responses: list) -> List[dict]:
+    """
+    Attach title relevance scores and keep the relevant sections.
+    Each response is either a score from the prefilter, the model's reply or the
+    exception raised by its request.
+    """
+    validated_sections = []
+    
+    for section, response in zip(sections, responses):
+        if isinstance(response, Exception):
+            print(f"Error validating section '{section['title']}': {response}, including by default")
+            validated_sections.append(section)
+            continue
         
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You assess the relevance of research paper sections to the paper's title."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=10
-            )
-            
+        if isinstance(response, float):
+            score = response
+        else:
             score_text = response.choices[0].message.content.strip()
             # Extract numeric score
             score_match = re.search(r'\d+(?:\.\d+)?', score_text)
-            if score_match:
-                score = float(score_match.group())
-                section['title_relevance'] = score
-                print(f"Section '{section['title']}' - Title Relevance: {score}/10")
-                
-                # Keep sections with score >= 6
-                if score >= 6:
-                    validated_sections.append(section)
-                else:
-                    print(f"  - Section filtered: Low relevance to title")
-            else:
+            if not score_match:
                 print(f"Could not extract score for section '{section['title']}', including by default")
                 validated_sections.append(section)
-        except Exception as e:
-            print(f"Error validating section '{section['title']}': {e}, including by default")
+                continue
+            score = float(score_match.group())
+        
+        section['title_relevance'] = score
+        print(f"Section '{section['title']}' - Title Relevance: {score}/9")
+        
+        # Keep sections with score >= MIN_TITLE_RELEVANCE
+        if score >= MIN_TITLE_RELEVANCE:
             validated_sections.append(section)
+        else:
+            print(f"  - Section filtered: Low relevance to title")
     
     # If we filtered out too many sections, keep at least 3 most relevant
     if len(validated_sections) < 3 and len(sections) >= 3:
@@ -68,11 +138,48 @@ Return ONLY a number from 0 to 10 representing the relevance score.
     
     return validated_sections
 
-def perform_topic_modeling(client: OpenAI, sections: List[dict], model: str, num_topics: int = 3) -> List[List[str]]:
+def validate_content_against_title(client: OpenAI, title: str, sections: List[dict], model: str,
+                                   abstract: str = "") -> List[dict]:
     """
-    Perform basic topic modeling to identify main themes across sections.
-    Returns a list of topics, each represented as a list of key terms.
+    Validate each section's relevance to the paper's title.
+    When the abstract is given, clearly (ir)relevant sections are scored locally
+    and only the ambiguous ones are sent to the LLM.
+    Returns sections that are relevant to the title.
+    """
+    responses = _prefilter_scores(title, abstract, sections)
+    for i, section in enumerate(sections):
+        if responses[i] is not None:
+            continue
+        try:
+            responses[i] = chat_completion(client, **_validation_request(title, section, model))
+        except Exception as e:
+            responses[i] = e
+    
+    return _select_relevant_sections(sections, responses)
+
+async def validate_content_against_title_async(client: AsyncOpenAI, title: str, sections: List[dict], model: str,
+                                               abstract: str = "",
+                                               semaphore: Optional[asyncio.Semaphore] = None) -> List[dict]:
+    """
+    Async variant of validate_content_against_title that scores the sections concurrently.
+    An optional semaphore bounds the number of requests in flight.
     """
+    # A private semaphore leaves the requests unbounded
+    semaphore = semaphore or asyncio.Semaphore(len(sections) or 1)
+    
+    async def score(section: dict):
+        async with semaphore:
+            return await chat_completion_async(client, **_validation_request(title, section, model))
+    
+    responses = _prefilter_scores(title, abstract, sections)
+    pending = [i for i, response in enumerate(responses) if response is None]
+    results = await asyncio.gather(*[score(sections[i]) for i in pending], return_exceptions=True)
+    for i, result in zip(pending, results):
+        responses[i] = result
+    return _select_relevant_sections(sections, responses)
+
+def _topic_modeling_messages(sections: List[dict], num_topics: int, model: str) -> list:
+    """Build the chat messages for modeling the main topics across sections."""
     # Combine all section texts
     all_text = " ".join([section['content'] for section in sections])
     
@@ -81,24 +188,52 @@ For each topic, list 5-7 keywords that best represent that topic.
 Format the response as a JSON list of lists, where each inner list contains the keywords for one topic.
 
 Text excerpt:
-{all_text[:8000]}  # Limit text length
+{truncate_to_tokens(all_text, TOPIC_MODELING_TOKENS, model)}
 """
     
+    return [
+        {"role": "system", "content": "You perform topic modeling on research papers."},
+        {"role": "user", "content": prompt}
+    ]
+
+def perform_topic_modeling(client: OpenAI, sections: List[dict], model: str, num_topics: int = 3) -> List[List[str]]:
+    """
+    Perform basic topic modeling to identify main themes across sections.
+    Returns a list of topics, each represented as a list of key terms.
+    """
+    try:
+        response = chat_completion(
+            client,
+            model=model,
+            messages=_topic_modeling_messages(sections, num_topics, model),
+            temperature=0.2,
+            response_format={"type": "json_object"}
+        )
+        
+        # Parse the JSON response
+        topics_json = response.choices[0].message.content.strip()
+        topics_list = json.loads(topics_json)
+        return topics_list.get('topics', [])
+    except Exception as e:
+        print(f"Error in topic modeling: {e}")
+        return []
+
+async def perform_topic_modeling_async(client: AsyncOpenAI, sections: List[dict], model: str,
+                                       num_topics: int = 3) -> List[List[str]]:
+    """Async variant of perform_topic_modeling for use with a shared AsyncOpenAI client."""
     try:
-        response = client.chat.completions.create(
+        response = await chat_completion_async(
+            client,
             model=model,
-            messages=[
-                {"role": "system", "content": "You perform topic modeling on research papers."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=_topic_modeling_messages(sections, num_topics, model),
             temperature=0.2,
             response_format={"type": "json_object"}
         )
         
         # Parse the JSON response
         topics_json = response.choices[0].message.content.strip()
-        topics_list = eval(topics_json)
+        topics_list = json.loads(topics_json)
         return topics_list.get('topics', [])
     except Exception as e:
         print(f"Error in topic modeling: {e}")
-        return []
\ No newline at end of file
+        return []
@@ -2,29 +2,44 @@
 Main summarizer class that orchestrates the paper processing pipeline.
 """
 
+import asyncio
+import hashlib
 import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import Callable, List, Dict, Any, Optional, Tuple
+import diskcache
+import httpx
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from .extractors.pdf import extract_text_and_title, list_pdfs
-from .extractors.section import detect_sections, extract_abstract
-from .processors.topic import extract_paper_topic, compute_topic_similarity, filter_irrelevant_sections
+from .extractors.pdf import extract_text_and_title, list_pdfs, pdf_sha256
+from .extractors.section import build_paper_excerpt, detect_sections, extract_abstract
+from .processors.topic import extract_paper_topic_async, filter_irrelevant_sections
 from .processors.coherence import ensure_content_coherence
-from .processors.validation import validate_content_against_title, perform_topic_modeling
-from .generators.summary import map_summarize_section, reduce_summarize
-from .generators.takeaways import generate_key_takeaways
-from .generators.engineers_corner import generate_engineers_corner
+from .processors.validation import validate_content_against_title_async, perform_topic_modeling_async
+from .generators.summary import (
+    batch_summarize_sections_async, map_section_request, map_summarize_section_async, reduce_summarize_async
+)
+from .generators.takeaways import generate_key_takeaways_async, key_takeaways_request
+from .generators.engineers_corner import engineers_corner_request, generate_engineers_corner_async
 from .formatters.pdf import write_summary_pdf
-from .utils.text import sanitize_filename, chunk_text
+from .utils.text import sanitize_filename
+from .utils.tokens import count_tokens
+from .utils.batch import run_batch
+from .utils.checkpoint import CHECKPOINT_NAME, Checkpoint
+from .utils.llm_cache import AsyncCachingTransport, CachingTransport, open_cache
+from .utils.rate_limit import AsyncRateLimitTransport, RateLimiter
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Default configuration
 DEFAULT_CONFIG = {
-    "CHUNK_SIZE": 15_000,  # chars per LLM call
+    "CHUNK_TOKENS": 3_000,  # Tokens of a section per LLM call; longer sections are split
     "SECTION_TITLES": [
         r"abstract",
         r"introduction",
@@ -40,14 +55,52 @@ DEFAULT_CONFIG = {
         r"reference(s)?|bibliography"
     ],
     "MIN_SIMILARITY": 0.15,  # Minimum similarity threshold for topic filtering
-    "LLM_MODEL": "gpt-4o"
+    "LLM_MODEL": "gpt-4o",
+    "SCORING_MODEL": "gpt-4o-mini",  # Cheaper model for topic extraction, title validation and topic modeling
+    "MAX_CONNECTIONS": 20,  # Size of the pooled HTTP/2 connection pool to the OpenAI API
+    "MAX_CONCURRENT_REQUESTS": 10,  # Section summaries requested concurrently during the map phase
+    "MAP_BATCH_TOKENS": 100_000,  # Most section tokens summarized in one batched request
+    "CHUNKS_PER_REQUEST": 6,  # Most sections per batched request; 6 x 2500 output tokens fit the 16k cap
+    "MAX_CONCURRENT_VALIDATIONS": 20,  # Title-relevance checks requested concurrently
+    "EXCERPT_TOKENS": 8_000,  # Paper excerpt sent for key takeaways and Engineer's Corner
+    "MAX_WORKERS": min(8, os.cpu_count() or 1),  # Worker processes used by summarize_directory
+    "MAX_CONCURRENT_PAPERS": 4,  # Papers processed at the same time on one event loop
+    "CACHE_DIR": str(Path.home() / ".cache" / "engpapersumm"),  # Directory caching LLM responses across runs (None disables)
+    "CACHE_TTL": 30 * 24 * 3600,  # Seconds a cached LLM response is reused (None keeps it forever)
+    "BATCH_POLL_SECONDS": 60,  # Interval between status checks of a summarize_directory_batch job
+    "BATCH_API_THRESHOLD": None  # Directory runs use the Batch API from this many PDFs (None: never)
 }
 
+# Summarizer owned by each summarize_directory worker process
+_worker_summarizer = None
+
+def _init_worker(config: dict):
+    """Create the worker's own summarizer; OpenAI clients cannot be pickled across processes."""
+    global _worker_summarizer
+    _worker_summarizer = PaperSummarizer(config)
+
+def _summarize_in_worker(pdf_path: Path, output_dir: Path) -> Path:
+    """Summarize one PDF with the worker's summarizer."""
+    # The pool already runs a process per CPU, so each paper is extracted sequentially
+    # instead of starting a page-extraction pool of its own in every worker
+    return _worker_summarizer._run(_worker_summarizer._summarize_pdf_async(pdf_path, output_dir, extract_workers=1))
+
 class PaperSummarizer:
     """
     Main class for summarizing research papers into engineer-focused summaries.
     """
     
+    # Response cache, sync client and rate limiter of each (process, API key, settings), see __init__
+    _clients: Dict[tuple, Tuple[Optional[diskcache.Cache], OpenAI, RateLimiter]] = {}
+    # Async clients of each event loop, by the same key
+    _aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, AsyncOpenAI]]" = \
+        weakref.WeakKeyDictionary()
+    _clients_lock = threading.Lock()
+    # Summary PDFs are rendered on their own threads, so a finished paper's write does not queue
+    # behind the extraction and hashing of the next papers in the default executor. One pool per
+    # process is shared by all summarizers; a forked worker cannot use the threads of its parent
+    _writer_pools: Dict[int, ThreadPoolExecutor] = {}
+    
     def __init__(self, config=None):
         """
         Initialize the summarizer with configuration settings.
@@ -60,11 +113,90 @@ class PaperSummarizer:
         if config:
             self.config.update(config)
         
-        # Initialize OpenAI client
+        # Initialize OpenAI clients; each keeps one pooled HTTP/2 connection set for all requests
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
-        self.client = OpenAI(api_key=api_key)
+        self._api_key = api_key
+        # Every pooled connection is kept alive between requests instead of only the httpx default 20
+        self._limits = httpx.Limits(max_connections=self.config["MAX_CONNECTIONS"],
+                                    max_keepalive_connections=self.config["MAX_CONNECTIONS"])
+        
+        # Summarizers with the same key, pool size and cache share their clients, response cache
+        # and rate-limit headroom (which the API tracks per key, shared by the async clients of
+        # every event loop); the process id keeps forked workers off the connections of their parent
+        self._client_key = (os.getpid(), hashlib.sha256(api_key.encode()).hexdigest(),
+                            self.config["MAX_CONNECTIONS"], self.config["CACHE_DIR"], self.config["CACHE_TTL"])
+        with PaperSummarizer._clients_lock:
+            if self._client_key not in PaperSummarizer._clients:
+                PaperSummarizer._clients[self._client_key] = self._create_client()
+            self.cache, self.client, self.rate_limiter = PaperSummarizer._clients[self._client_key]
+        self._thread_state = threading.local()
+        
+        # Summaries in progress on each event loop, by (PDF hash, output directory)
+        self._inflight = weakref.WeakKeyDictionary()
+    
+    def _create_client(self) -> Tuple[Optional[diskcache.Cache], OpenAI, RateLimiter]:
+        """Open the response cache and create the sync client reading through it, and a rate limiter."""
+        # Identical requests (e.g. reruns on an unchanged paper) are answered from the cache
+        cache = open_cache(self.config["CACHE_DIR"]) if self.config["CACHE_DIR"] else None
+        transport = httpx.HTTPTransport(http2=True, limits=self._limits)
+        if cache is not None:
+            transport = CachingTransport(transport, cache, self.config["CACHE_TTL"])
+        
+        # Retries are handled with backoff by utils.llm, so the SDK's own retries are disabled
+        client = OpenAI(api_key=self._api_key, max_retries=0, http_client=httpx.Client(transport=transport))
+        return cache, client, RateLimiter()
+    
+    @property
+    def _writer_pool(self) -> ThreadPoolExecutor:
+        """Summary writer threads of this process."""
+        pid = os.getpid()
+        with PaperSummarizer._clients_lock:
+            pool = PaperSummarizer._writer_pools.get(pid)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary-writer")
+                PaperSummarizer._writer_pools[pid] = pool
+        return pool
+    
+    @property
+    def aclient(self) -> AsyncOpenAI:
+        """
+        Async OpenAI client for the running event loop.
+        
+        Pooled async connections are bound to the loop that opened them, so each
+        loop (e.g. the per-thread loop of the sync pipeline) gets its own client.
+        Summarizers sharing a sync client also share the async client of a loop,
+        multiplexing their requests over the same HTTP/2 connections.
+        """
+        loop = asyncio.get_running_loop()
+        with PaperSummarizer._clients_lock:
+            aclients = PaperSummarizer._aclients.setdefault(loop, {})
+        aclient = aclients.get(self._client_key)
+        if aclient is None:
+            transport = httpx.AsyncHTTPTransport(http2=True, limits=self._limits)
+            # Cache hits are answered before throttling, so they never wait on the rate limits
+            transport = AsyncRateLimitTransport(transport, self.rate_limiter)
+            if self.cache is not None:
+                transport = AsyncCachingTransport(transport, self.cache, self.config["CACHE_TTL"])
+            aclient = AsyncOpenAI(api_key=self._api_key, max_retries=0,
+                                  http_client=httpx.AsyncClient(transport=transport))
+            aclients[self._client_key] = aclient
+        return aclient
+    
+    def _run(self, coro):
+        """
+        Run a coroutine to completion on this thread's event loop.
+        
+        The loop is kept between calls, so its async client (and the pooled
+        connections and executor threads behind it) are reused across files
+        instead of being rebuilt by a fresh asyncio.run for every paper.
+        """
+        loop = getattr(self._thread_state, "loop", None)
+        if loop is None or loop.is_closed():
+            loop = asyncio.new_event_loop()
+            self._thread_state.loop = loop
+        return loop.run_until_complete(coro)
     
     def summarize_file(self, pdf_path: Path, output_dir: Path = None) -> Path:
         """
@@ -80,22 +212,120 @@ class PaperSummarizer:
         if not output_dir:
             output_dir = pdf_path.parent
         
-        # Extract text from the PDF
-        text, title = extract_text_and_title(pdf_path)
+        # Extract, summarize and write on the reused event loop
+        return self._run(self._summarize_pdf_async(pdf_path, output_dir))
+    
+    async def summarize_file_async(self, pdf_path: Path, output_dir: Path = None,
+                                   extraction: Optional[asyncio.Future] = None, sha: Optional[str] = None) -> Path:
+        """
+        Async variant of summarize_file.
+        
+        Blocking stages run in the default executor while LLM requests go through
+        the async client, so several papers can be processed concurrently on one
+        event loop. Concurrent calls for the same paper content (e.g. a copied file)
+        and output directory share one run instead of summarizing it twice.
+        
+        extraction, if given, is an already started extract_text_and_title of
+        pdf_path (summarize_directory_async parses papers ahead in worker processes),
+        and sha, if given, is the already computed pdf_sha256 of pdf_path.
+        """
+        if not output_dir:
+            output_dir = pdf_path.parent
+        loop = asyncio.get_running_loop()
+        
+        if sha is None:
+            sha = await loop.run_in_executor(None, pdf_sha256, pdf_path)
+        key = (sha, Path(output_dir))
+        inflight = self._inflight.setdefault(loop, {})
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._summarize_pdf_async(pdf_path, output_dir, extraction))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        else:
+            print(f"⏳ {pdf_path.name} is already being summarized, sharing that run...")
+            if extraction is not None:
+                extraction.cancel()
+        # Shielded, so one caller being cancelled does not cancel the run for the others
+        return await asyncio.shield(task)
+    
+    async def _summarize_pdf_async(self, pdf_path: Path, output_dir: Path,
+                                   extraction: Optional[asyncio.Future] = None,
+                                   extract_workers: Optional[int] = None) -> Path:
+        """
+        Extract, summarize and write one paper, reusing extraction if it was started already.
+        
+        extract_workers is the max_workers of the extraction otherwise started here.
+        """
+        loop = asyncio.get_running_loop()
+        
+        # Extract text from the PDF. The topic request only needs the title and abstract,
+        # so it starts from the first pages while the rest of the paper is still extracted
+        if extraction is None:
+            lead = loop.create_future()
+            extraction = loop.run_in_executor(None, partial(
+                extract_text_and_title, pdf_path, max_workers=extract_workers,
+                on_lead=lambda *lead_args: loop.call_soon_threadsafe(lead.set_result, lead_args)
+            ))
+            # A failed extraction never reports its lead, so wait for whichever comes first
+            await asyncio.wait({lead, extraction}, return_when=asyncio.FIRST_COMPLETED)
+            lead_text, title = await (lead if lead.done() else extraction)
+        else:
+            # Parsed ahead in a worker process, so the full text (and its abstract) is already due
+            lead_text, title = await extraction
+        print("Extracting main paper topics...")
+        topic_task = asyncio.ensure_future(self._extract_topic(lead_text, title))
+        try:
+            text, title = await extraction
+        except BaseException:
+            topic_task.cancel()
+            raise
         
-        # Perform hierarchical summarization
         print(f"⏳ Processing {pdf_path.name}...")
-        summary = self._hierarchical_summarize(text, title)
+        summary, key_takeaways, engineers_corner = await self._generate_content(text, title, topic_task)
         
-        # Generate key takeaways
-        print("Generating key takeaways...")
-        key_takeaways = generate_key_takeaways(self.client, text, title, self.config["LLM_MODEL"])
+        return await loop.run_in_executor(
+            self._writer_pool, self._write_summary, output_dir, title, summary, key_takeaways, engineers_corner
+        )
+    
+    async def _generate_content(self, text: str, title: str,
+                                topic_task: Optional[asyncio.Future] = None) -> Tuple[str, str, str]:
+        """
+        Generate the summary, key takeaways and Engineer's Corner concurrently.
         
-        # Generate Engineer's Corner section
-        print("Generating Engineer's Corner...")
-        engineers_corner = generate_engineers_corner(self.client, text, title, self.config["LLM_MODEL"])
+        The takeaways and Engineer's Corner only need the paper excerpt, so they
+        run alongside the whole map-reduce pipeline rather than after it.
+        topic_task is an already started _extract_topic request, if any.
+        """
+        loop = asyncio.get_running_loop()
         
-        # Write to PDF
+        # Detect the sections once for the map-reduce pipeline and the excerpt shared between
+        # the whole-paper generators, off the event loop as both tokenize the whole paper
+        sections = await loop.run_in_executor(None, self._detect_sections, text)
+        excerpt = await loop.run_in_executor(None, self._paper_excerpt, text, sections)
+        print("Generating key takeaways and Engineer's Corner...")
+        return await asyncio.gather(
+            self._hierarchical_summarize_async(text, title, topic_task, sections),
+            generate_key_takeaways_async(self.aclient, excerpt, title, self.config["LLM_MODEL"]),
+            generate_engineers_corner_async(self.aclient, excerpt, title, self.config["LLM_MODEL"])
+        )
+    
+    async def _extract_topic(self, text: str, title: str) -> Dict[str, float]:
+        """Extract the paper's main topics from its title and the abstract found in text."""
+        return await extract_paper_topic_async(self.aclient, title, extract_abstract(text), self.config["SCORING_MODEL"])
+    
+    def _detect_sections(self, text: str) -> List[Dict[str, str]]:
+        """Detect the paper's sections, split to the configured chunk size."""
+        return detect_sections(text, self.config["SECTION_TITLES"], self.config["CHUNK_TOKENS"],
+                               self.config["LLM_MODEL"])
+    
+    def _paper_excerpt(self, text: str, sections: List[Dict[str, str]]) -> str:
+        """Build the paper excerpt from its detected sections within the configured token budget."""
+        return build_paper_excerpt(text, sections, self.config["EXCERPT_TOKENS"], self.config["LLM_MODEL"])
+    
+    def _write_summary(self, output_dir: Path, title: str, summary: str, key_takeaways: str,
+                       engineers_corner: str) -> Path:
+        """Write the summary PDF for a paper and return its path."""
         safe_title = sanitize_filename(title)
         out_file = output_dir / f"{safe_title}-engineering-summary.pdf"
         write_summary_pdf(out_file, title, summary, key_takeaways, engineers_corner)
@@ -107,6 +337,9 @@ class PaperSummarizer:
         """
         Summarize all PDFs in a directory.
         
+        Finished papers are recorded in a checkpoint file in output_dir, so rerunning
+        after a crash only summarizes the papers that were not done yet.
+        
         Args:
             dir_path (Path): Directory containing PDF files
             output_dir (Path, optional): Directory to save outputs. Defaults to input directory.
@@ -122,31 +355,301 @@ class PaperSummarizer:
             print("⚠️  No PDF files found. Exiting.")
             return []
         
-        output_files = []
-        for pdf_path in pdf_files:
-            out_file = self.summarize_file(pdf_path, output_dir)
-            output_files.append(out_file)
+        hashes, done, record = self._open_checkpoint(pdf_files, output_dir)
+        pending = [pdf_path for pdf_path in pdf_files if done[pdf_path] is None]
+        
+        workers = min(self.config["MAX_WORKERS"], len(pending))
+        if self._use_batch_api(pending):
+            self._summarize_files_batch_and_record(pending, output_dir, record)
+        elif workers <= 1:
+            # In a single process, papers still overlap their LLM calls on the event loop
+            self._run(self._summarize_files_async(pending, output_dir, on_done=record, hashes=hashes))
+        else:
+            # Papers are independent, so process them in parallel. A failed paper does not stop
+            # the others, so everything that finished is in the checkpoint when the error is raised
+            failures = []
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.config,)) as executor:
+                futures = {
+                    executor.submit(_summarize_in_worker, pdf_path, output_dir): pdf_path
+                    for pdf_path in pending
+                }
+                for future in as_completed(futures):
+                    try:
+                        record(futures[future], future.result())
+                    except Exception as e:
+                        print(f"❌ Failed to summarize {futures[future].name}: {e}")
+                        failures.append(e)
+            if failures:
+                raise failures[0]
+            
+        # Results keep the input order
+        return [done[pdf_path] for pdf_path in pdf_files]
+    
+    def _open_checkpoint(self, pdf_files: List[Path], output_dir: Path) -> Tuple[
+            Dict[Path, str], Dict[Path, Optional[Path]], Callable[[Path, Path], None]]:
+        """
+        Look up pdf_files in output_dir's checkpoint.
+        
+        Returns the pdf_sha256 of each PDF, so it is not hashed again, the summary of each PDF
+        that is already done (None for the others), and a function recording a PDF as
+        summarized, both in the checkpoint and in that mapping.
+        """
+        checkpoint = Checkpoint(output_dir / CHECKPOINT_NAME)
+        hashes = {pdf_path: pdf_sha256(pdf_path) for pdf_path in pdf_files}
+        done = {pdf_path: checkpoint.get(sha) for pdf_path, sha in hashes.items()}
+        resumed = sum(out_file is not None for out_file in done.values())
+        if resumed:
+            print(f"Resuming: {resumed} of {len(pdf_files)} papers already summarized")
+        
+        def record(pdf_path: Path, out_file: Path):
+            checkpoint.record(hashes[pdf_path], out_file)
+            done[pdf_path] = out_file
+        
+        return hashes, done, record
+    
+    def _use_batch_api(self, pdf_files: List[Path]) -> bool:
+        """Whether a directory run summarizes pdf_files through the Batch API (see BATCH_API_THRESHOLD)."""
+        threshold = self.config["BATCH_API_THRESHOLD"]
+        return threshold is not None and len(pdf_files) >= threshold
+    
+    def _summarize_files_batch_and_record(self, pdf_files: List[Path], output_dir: Path,
+                                          record: Callable[[Path, Path], None]):
+        """Summarize pdf_files as one Batch API job and record each of them as done."""
+        print(f"{len(pdf_files)} papers to summarize, submitting them through the Batch API")
+        for pdf_path, out_file in zip(pdf_files, self._summarize_files_batch(pdf_files, output_dir)):
+            record(pdf_path, out_file)
+    
+    async def summarize_directory_async(self, dir_path: Path, output_dir: Path = None) -> List[Path]:
+        """
+        Async variant of summarize_directory.
+        
+        Papers are summarized concurrently on the running event loop, at most
+        MAX_CONCURRENT_PAPERS at a time. Their text is extracted ahead in up to
+        MAX_WORKERS processes, so parsing the next papers overlaps the LLM calls
+        of the current ones. Like summarize_directory, finished papers are recorded
+        in output_dir's checkpoint and skipped when the run is repeated, and from
+        BATCH_API_THRESHOLD papers on they are sent as one Batch API job instead.
+        Results keep the input order.
+        """
+        if not output_dir:
+            output_dir = dir_path
             
-        return output_files
+        pdf_files = list_pdfs(dir_path)
+        if not pdf_files:
+            print("⚠️  No PDF files found. Exiting.")
+            return []
+        
+        loop = asyncio.get_running_loop()
+        hashes, done, record = await loop.run_in_executor(None, self._open_checkpoint, pdf_files, output_dir)
+        pending = [pdf_path for pdf_path in pdf_files if done[pdf_path] is None]
+        if self._use_batch_api(pending):
+            # The batch job is polled for hours on its own thread, off this event loop
+            await loop.run_in_executor(None, self._summarize_files_batch_and_record, pending, output_dir, record)
+        else:
+            await self._summarize_files_async(pending, output_dir, on_done=record, hashes=hashes)
+        
+        return [done[pdf_path] for pdf_path in pdf_files]
+    
+    async def _summarize_files_async(self, pdf_files: List[Path], output_dir: Path,
+                                     on_done: Optional[Callable[[Path, Path], None]] = None,
+                                     hashes: Optional[Dict[Path, str]] = None) -> List[Path]:
+        """
+        Summarize pdf_files concurrently, at most MAX_CONCURRENT_PAPERS at a time, keeping their order.
+        on_done, if given, is called (in the default executor) with each PDF and its summary as soon
+        as that paper is finished, and hashes holds the pdf_sha256 already computed for the PDFs.
+        A failed paper does not stop the others; the first error is raised once they are all done.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.config["MAX_CONCURRENT_PAPERS"])
+        
+        # PDF parsing is CPU-bound, so with several workers it runs in processes rather than
+        # the default executor's threads. Papers are extracted at most `workers` ahead of the
+        # ones being summarized, which bounds the extracted text held in memory
+        workers = min(self.config["MAX_WORKERS"], len(pdf_files))
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        prefetch = asyncio.Semaphore(self.config["MAX_CONCURRENT_PAPERS"] + workers)
+        # Papers are spread over the processes, so each one is extracted sequentially
+        extract = partial(extract_text_and_title, max_workers=1)
+        extractions = []
+        
+        async def summarize_one(pdf_path: Path) -> Path:
+            async with prefetch:
+                extraction = None
+                if executor is not None:
+                    extraction = loop.run_in_executor(executor, extract, pdf_path)
+                    extractions.append(extraction)
+                async with semaphore:
+                    out_file = await self.summarize_file_async(pdf_path, output_dir, extraction,
+                                                               sha=(hashes or {}).get(pdf_path))
+            if on_done is not None:
+                await loop.run_in_executor(None, on_done, pdf_path, out_file)
+            return out_file
+        
+        try:
+            results = await asyncio.gather(*[summarize_one(pdf_path) for pdf_path in pdf_files],
+                                           return_exceptions=True)
+        finally:
+            if executor is not None:
+                # After a failure, drop queued extractions instead of waiting for them
+                for extraction in extractions:
+                    extraction.cancel()
+                executor.shutdown(wait=False)
+        
+        failures = [(pdf_path, result) for pdf_path, result in zip(pdf_files, results)
+                    if isinstance(result, BaseException)]
+        for pdf_path, error in failures:
+            print(f"❌ Failed to summarize {pdf_path.name}: {error}")
+        if failures:
+            raise failures[0][1]
+        return results
+    
+    def summarize_directory_batch(self, dir_path: Path, output_dir: Path = None) -> List[Path]:
+        """
+        Summarize all PDFs in a directory through the OpenAI Batch API.
+        
+        Meant for large, non-interactive runs: the Batch API costs half as much and has
+        its own rate limits, but may take up to 24 hours. Section scoring still runs
+        interactively on SCORING_MODEL; every map-phase request, key takeaways and
+        Engineer's Corner of all papers then go out as one batch job, and the reduce
+        phase runs once the batch has finished. Requests the batch could not complete
+        are retried interactively. Results keep the input order.
+        """
+        if not output_dir:
+            output_dir = dir_path
+            
+        pdf_files = list_pdfs(dir_path)
+        if not pdf_files:
+            print("⚠️  No PDF files found. Exiting.")
+            return []
+        
+        return self._summarize_files_batch(pdf_files, output_dir)
+    
+    def _summarize_files_batch(self, pdf_files: List[Path], output_dir: Path) -> List[Path]:
+        """Summarize pdf_files with one Batch API job, see summarize_directory_batch."""
+        keys, papers = self._run(self._prepare_papers(pdf_files))
+        
+        # custom_ids are "<pdf hash>:<section index>", "<pdf hash>:takeaways" and "<pdf hash>:engineers_corner"
+        model = self.config["LLM_MODEL"]
+        requests = {}
+        for key, paper in papers.items():
+            for i, section in enumerate(paper['sections']):
+                requests[f"{key}:{i}"] = map_section_request(section, model)
+            requests[f"{key}:takeaways"] = key_takeaways_request(paper['excerpt'], paper['title'], model)
+            requests[f"{key}:engineers_corner"] = engineers_corner_request(paper['excerpt'], paper['title'], model)
+        
+        results = run_batch(self.client, requests, self.config["BATCH_POLL_SECONDS"])
+        
+        output_files = self._run(self._finish_papers(papers, results, output_dir))
+        return [output_files[key] for key in keys]
+    
+    async def _prepare_papers(self, pdf_files: List[Path]) -> Tuple[List[str], Dict[str, dict]]:
+        """
+        Extract each paper and prepare its sections for a batch run, MAX_CONCURRENT_PAPERS at a time.
+        Returns the content hash of every file, in input order, and the prepared papers by hash;
+        identical files are only prepared once.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.config["MAX_CONCURRENT_PAPERS"])
+        keys = await asyncio.gather(*[loop.run_in_executor(None, pdf_sha256, pdf_path) for pdf_path in pdf_files])
+        
+        async def prepare_one(key: str, pdf_path: Path) -> Tuple[str, dict]:
+            async with semaphore:
+                text, title = await loop.run_in_executor(None, extract_text_and_title, pdf_path)
+                print(f"⏳ Preparing {pdf_path.name}...")
+                sections = await loop.run_in_executor(None, self._detect_sections, text)
+                excerpt = await loop.run_in_executor(None, self._paper_excerpt, text, sections)
+                sections = await self._prepare_sections_async(text, title, sections=sections)
+                return key, {'title': title, 'excerpt': excerpt, 'sections': sections}
+        
+        unique_files = {}
+        for key, pdf_path in zip(keys, pdf_files):
+            unique_files.setdefault(key, pdf_path)
+        prepared = await asyncio.gather(*[prepare_one(key, pdf_path) for key, pdf_path in unique_files.items()])
+        return keys, dict(prepared)
+    
+    async def _finish_papers(self, papers: Dict[str, dict], results: Dict[str, Optional[str]],
+                             output_dir: Path) -> Dict[str, Path]:
+        """
+        Run the reduce phase and write the summary of every batched paper.
+        Replies missing from the batch results are requested interactively.
+        Returns the output paths by paper hash.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.config["MAX_CONCURRENT_PAPERS"])
+        model = self.config["LLM_MODEL"]
+        
+        async def section_summary(key: str, i: int, section: dict) -> dict:
+            reply = results[f"{key}:{i}"]
+            if reply is None:
+                return await map_summarize_section_async(self.aclient, section, model)
+            return {'title': section['title'], 'content': reply}
+        
+        async def finish_one(key: str, paper: dict) -> Tuple[str, Path]:
+            async with semaphore:
+                title, excerpt = paper['title'], paper['excerpt']
+                section_summaries = await asyncio.gather(*[
+                    section_summary(key, i, section) for i, section in enumerate(paper['sections'])
+                ])
+                key_takeaways = (results[f"{key}:takeaways"]
+                                 or await generate_key_takeaways_async(self.aclient, excerpt, title, model))
+                engineers_corner = (results[f"{key}:engineers_corner"]
+                                    or await generate_engineers_corner_async(self.aclient, excerpt, title, model))
+                print(f"Reduce phase: Synthesizing section summaries of {title}...")
+                summary = await reduce_summarize_async(self.aclient, section_summaries, model)
+                return key, await loop.run_in_executor(
+                    self._writer_pool, self._write_summary, output_dir, title, summary, key_takeaways,
+                    engineers_corner
+                )
+        
+        return dict(await asyncio.gather(*[finish_one(key, paper) for key, paper in papers.items()]))
 
-    def _hierarchical_summarize(self, text: str, title: str) -> str:
+    async def _hierarchical_summarize_async(self, text: str, title: str,
+                                            topic_task: Optional[asyncio.Future] = None,
+                                            sections: Optional[List[Dict[str, str]]] = None) -> str:
         """
         Perform hierarchical (Map-Reduce) summarization on the paper text.
         First detects sections, applies content coherence checks, then summarizes each section,
         and finally combines them into a coherent summary.
+        Independent LLM calls are issued concurrently and overlap with local processing.
         """
-        # Extract abstract for topic analysis
+        validated_sections = await self._prepare_sections_async(text, title, topic_task, sections)
+        
+        # 7. Map phase: Summarize each validated section
+        print(f"Map phase: Summarizing {len(validated_sections)} sections...")
+        section_summaries = await self._map_sections(validated_sections)
+        
+        # 8. Reduce phase: Fuse section summaries into a coherent whole
+        print("Reduce phase: Synthesizing section summaries...")
+        final_summary = await reduce_summarize_async(self.aclient, section_summaries, self.config["LLM_MODEL"])
+        
+        return final_summary
+    
+    async def _prepare_sections_async(self, text: str, title: str,
+                                      topic_task: Optional[asyncio.Future] = None,
+                                      sections: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        """
+        Detect, filter and validate the paper's sections (steps 1-6 of the pipeline).
+        Returns the sections to summarize, each carrying the shared topic guidance.
+        sections, if given, are the already detected sections of text.
+        """
+        loop = asyncio.get_running_loop()
+        
+        # Extract abstract for topic analysis and title validation
         abstract = extract_abstract(text)
         print(f"Extracted abstract: {abstract[:200]}...")
         
-        # 1. Extract main topics from title and abstract
-        print("Extracting main paper topics...")
-        topic_dict = extract_paper_topic(self.client, title, abstract, self.config["LLM_MODEL"])
-        print(f"Extracted topics: {topic_dict}")
+        # 1. Extract main topics from title and abstract, unless the caller already started it
+        if topic_task is None:
+            print("Extracting main paper topics...")
+            topic_task = asyncio.ensure_future(self._extract_topic(text, title))
         
-        # 2. Detect sections in the paper
-        sections = detect_sections(text, self.config["SECTION_TITLES"], self.config["CHUNK_SIZE"])
+        # 2. Detect sections in the paper while the topic request is in flight
+        if sections is None:
+            sections = await loop.run_in_executor(None, self._detect_sections, text)
         print(f"Initially detected {len(sections)} sections")
+        topic_dict = await topic_task
+        print(f"Extracted topics: {topic_dict}")
         
         # 3. Filter sections by topic relevance
         print("Filtering sections by topic relevance...")
@@ -158,34 +661,74 @@ class PaperSummarizer:
         coherent_sections = ensure_content_coherence(relevant_sections)
         print(f"After coherence check: {len(coherent_sections)} sections")
         
-        # 5. Validate sections against paper title
-        print("Validating sections against paper title...")
-        validated_sections = validate_content_against_title(self.client, title, coherent_sections, self.config["LLM_MODEL"])
+        # 5. Validate sections against paper title and 6. perform topic modeling, concurrently;
+        # topic modeling reads the coherent sections as title validation rarely drops many
+        print("Validating sections against paper title and performing topic modeling...")
+        validated_sections, topics = await asyncio.gather(
+            validate_content_against_title_async(
+                self.aclient, title, coherent_sections, self.config["SCORING_MODEL"], abstract=abstract,
+                semaphore=asyncio.Semaphore(self.config["MAX_CONCURRENT_VALIDATIONS"])
+            ),
+            perform_topic_modeling_async(self.aclient, coherent_sections, self.config["SCORING_MODEL"])
+        )
         print(f"After title validation: {len(validated_sections)} sections")
-        
-        # 6. Perform topic modeling on final sections
-        print("Performing topic modeling on final sections...")
-        topics = perform_topic_modeling(self.client, validated_sections, self.config["LLM_MODEL"])
         print(f"Identified topics: {topics}")
         
-        # 7. Map phase: Summarize each validated section
-        print(f"Map phase: Summarizing {len(validated_sections)} sections...")
-        section_summaries = []
-        for i, section in enumerate(validated_sections):
-            print(f"  Processing section {i+1}/{len(validated_sections)}: {section['title']}")
-            
-            # Create topic guidance for more focused summarization
-            if topics:
-                topic_terms = ", ".join([", ".join(topic_list) for topic_list in topics])
-                section['topic_guidance'] = f"Focus on these key topics: {topic_terms}"
-            else:
-                section['topic_guidance'] = ""
-                
-            summary = map_summarize_section(self.client, section, self.config["LLM_MODEL"])
-            section_summaries.append(summary)
+        # Create topic guidance for more focused summarization
+        if topics:
+            topic_terms = ", ".join([", ".join(topic_list) for topic_list in topics])
+            topic_guidance = f"Focus on these key topics: {topic_terms}"
+        else:
+            topic_guidance = ""
+        for section in validated_sections:
+            section['topic_guidance'] = topic_guidance
         
-        # 8. Reduce phase: Fuse section summaries into a coherent whole
-        print("Reduce phase: Synthesizing section summaries...")
-        final_summary = reduce_summarize(self.client, section_summaries, self.config["LLM_MODEL"])
+        return validated_sections
+    
+    async def _map_sections(self, sections: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Summarize all sections.
         
-        return final_summary
\ No newline at end of file
+        Consecutive sections are grouped, up to CHUNKS_PER_REQUEST sections and
+        MAP_BATCH_TOKENS tokens per group, and each group is summarized with one
+        batched request. Sections left alone in a group, and groups whose batched
+        reply is unusable, get a request per section. At most MAX_CONCURRENT_REQUESTS
+        requests are in flight.
+        """
+        model = self.config["LLM_MODEL"]
+        semaphore = asyncio.Semaphore(self.config["MAX_CONCURRENT_REQUESTS"])
+        
+        async def summarize_group(group: List[Dict[str, str]]) -> List[Dict[str, str]]:
+            if len(group) > 1:
+                print(f"  Summarizing {len(group)} sections in one batched request")
+                try:
+                    async with semaphore:
+                        return await batch_summarize_sections_async(self.aclient, group, model)
+                except Exception as e:
+                    print(f"Batched summarization failed ({e}), summarizing sections one by one")
+            for section in group:
+                print(f"  Processing section: {section['title']}")
+            return await asyncio.gather(*[
+                map_summarize_section_async(self.aclient, section, model, semaphore)
+                for section in group
+            ])
+        
+        # gather preserves input order, so the reduce phase sees sections in paper order
+        groups = await asyncio.gather(*[summarize_group(group) for group in self._map_groups(sections)])
+        return [summary for group in groups for summary in group]
+    
+    def _map_groups(self, sections: List[Dict[str, str]]) -> List[List[Dict[str, str]]]:
+        """Split sections into consecutive groups within CHUNKS_PER_REQUEST and MAP_BATCH_TOKENS."""
+        model = self.config["LLM_MODEL"]
+        groups, group, group_tokens = [], [], 0
+        for section in sections:
+            tokens = count_tokens(section['content'], model)
+            if group and (len(group) >= self.config["CHUNKS_PER_REQUEST"]
+                          or group_tokens + tokens > self.config["MAP_BATCH_TOKENS"]):
+                groups.append(group)
+                group, group_tokens = [], 0
+            group.append(section)
+            group_tokens += tokens
+        if group:
+            groups.append(group)
+        return groups
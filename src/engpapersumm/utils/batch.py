@@ -0,0 +1,66 @@
+"""Run chat completion requests through the OpenAI Batch API (half price, results within 24h)."""
+
+import json
+import time
+from typing import Dict, Optional
+from openai import OpenAI
+
+from .llm import retry_transient
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Batches in these states will not make further progress
+_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+@retry_transient
+def _call(method, *args, **kwargs):
+    """
+    Call a client method, retrying transient failures. Only used for uploads and
+    reads: retrying batches.create after a timeout could submit the job twice.
+    """
+    return method(*args, **kwargs)
+
+def build_batch_file(requests: Dict[str, dict]) -> bytes:
+    """Serialize chat completion request arguments, keyed by custom_id, as Batch API JSONL."""
+    return "".join(
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}) + "\n"
+        for custom_id, body in requests.items()
+    ).encode()
+
+def parse_batch_output(text: str) -> Dict[str, Optional[str]]:
+    """Map each custom_id in a batch output file to its reply, or None if that request failed."""
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") == 200:
+            results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+        else:
+            results[record["custom_id"]] = None
+    return results
+
+def run_batch(client: OpenAI, requests: Dict[str, dict], poll_interval: float = 60.0) -> Dict[str, Optional[str]]:
+    """
+    Submit requests as one batch job, wait for it to finish and return the replies by custom_id.
+    Requests that failed or were not completed (e.g. the batch expired) map to None.
+    """
+    batch_file = _call(client.files.create, file=("requests.jsonl", build_batch_file(requests)), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h"
+    )
+    print(f"Submitted batch {batch.id} with {len(requests)} requests")
+
+    while batch.status not in _FINAL_STATUSES:
+        time.sleep(poll_interval)
+        batch = _call(client.batches.retrieve, batch.id)
+    print(f"Batch {batch.id} {batch.status}")
+
+    results = dict.fromkeys(requests)
+    # Expired and cancelled batches still return the requests that completed
+    if batch.output_file_id:
+        results.update(parse_batch_output(_call(client.files.content, batch.output_file_id).text))
+    return results
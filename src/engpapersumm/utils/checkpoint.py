@@ -0,0 +1,40 @@
+"""Record of the papers a directory run has finished, so an interrupted run can resume."""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+CHECKPOINT_NAME = ".engpapersumm_ckpt.jsonl"
+
+class Checkpoint:
+    """
+    Append-only JSONL file mapping the SHA256 of each summarized PDF to its summary.
+
+    Every entry is flushed to disk as soon as a paper is done, so a crash loses at
+    most the papers that were still in progress.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: Dict[str, Path] = {}
+        if path.exists():
+            for line in path.read_text().splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A crash mid-write leaves a truncated last line
+                self.done[entry["sha"]] = Path(entry["out"])
+
+    def get(self, sha: str) -> Optional[Path]:
+        """Summary recorded for a PDF, or None if it is not done or the summary has since been removed."""
+        out = self.done.get(sha)
+        return out if out is not None and out.exists() else None
+
+    def record(self, sha: str, out: Path):
+        """Durably mark the PDF with hash sha as summarized to out."""
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"sha": sha, "out": str(out)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done[sha] = out
@@ -0,0 +1,114 @@
+"""Chat completion helpers that retry transient OpenAI API failures."""
+
+from typing import Optional
+import httpx
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+# Rate limits, dropped connections, timeouts and 5xx responses usually succeed on a later attempt
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+# A streamed reply that sends nothing for this many seconds is treated as stalled and retried
+STREAM_STALL_TIMEOUT = 15.0
+
+# httpx applies the read timeout to every chunk of a stream, which makes it the stall detector
+_STREAM_TIMEOUT = httpx.Timeout(600.0, connect=5.0, read=STREAM_STALL_TIMEOUT)
+
+# A streamed reply whose last characters already appeared this often is repeating itself
+_REPEAT_TAIL_CHARS = 50
+_REPEAT_COUNT = 3
+# Repetition is checked once this many new characters have arrived rather than on every delta,
+# so the reply is rescanned a bounded number of times instead of once per token
+_REPEAT_CHECK_CHARS = 256
+
+# Exponential backoff with full jitter so concurrent requests do not retry in lockstep
+retry_transient = retry(
+    wait=wait_random_exponential(min=1, max=60),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    reraise=True
+)
+
+@retry_transient
+def chat_completion(client: OpenAI, **kwargs):
+    """Create a chat completion, retrying transient failures with exponential backoff."""
+    return client.chat.completions.create(**kwargs)
+
+@retry_transient
+async def chat_completion_async(client: AsyncOpenAI, **kwargs):
+    """Async variant of chat_completion."""
+    return await client.chat.completions.create(**kwargs)
+
+def _cut_repetition(text: str) -> Optional[str]:
+    """
+    If the last _REPEAT_TAIL_CHARS characters of text already occur _REPEAT_COUNT times,
+    return text up to the end of their first occurrence; otherwise None.
+    """
+    if len(text) < _REPEAT_TAIL_CHARS * _REPEAT_COUNT:
+        return None
+    tail = text[-_REPEAT_TAIL_CHARS:]
+    if text.count(tail) < _REPEAT_COUNT:
+        return None
+    return text[:text.find(tail) + _REPEAT_TAIL_CHARS]
+
+class _ReplyBuffer:
+    """Collect the deltas of a streamed reply, checking it for repetition as it grows."""
+    
+    def __init__(self):
+        self._parts = []
+        self._unchecked = 0
+    
+    def add(self, delta: str) -> Optional[str]:
+        """Append delta; returns the reply cut after its first repetition once it repeats itself, else None."""
+        self._parts.append(delta)
+        self._unchecked += len(delta)
+        if self._unchecked < _REPEAT_CHECK_CHARS:
+            return None
+        self._unchecked = 0
+        self._parts = [self.text()]
+        return _cut_repetition(self._parts[0])
+    
+    def text(self) -> str:
+        """The reply received so far."""
+        return "".join(self._parts)
+
+@retry_transient
+def stream_chat_completion(client: OpenAI, **kwargs) -> str:
+    """
+    Stream a chat completion and return its text.
+    A stalled stream raises APITimeoutError and is retried; a reply that starts
+    repeating itself is cut off instead of running to max_tokens.
+    """
+    reply = _ReplyBuffer()
+    stream = client.chat.completions.create(stream=True, timeout=_STREAM_TIMEOUT, **kwargs)
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                cut = reply.add(chunk.choices[0].delta.content)
+                if cut is not None:
+                    return cut
+    finally:
+        stream.close()
+    return reply.text()
+
+@retry_transient
+async def stream_chat_completion_async(client: AsyncOpenAI, **kwargs) -> str:
+    """Async variant of stream_chat_completion."""
+    reply = _ReplyBuffer()
+    stream = await client.chat.completions.create(stream=True, timeout=_STREAM_TIMEOUT, **kwargs)
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                cut = reply.add(chunk.choices[0].delta.content)
+                if cut is not None:
+                    return cut
+    finally:
+        await stream.close()
+    return reply.text()
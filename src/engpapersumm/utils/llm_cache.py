@@ -0,0 +1,182 @@
+"""Disk-backed cache of OpenAI chat completion responses, keyed by request hash."""
+
+import hashlib
+import json
+from typing import AsyncIterator, Callable, Iterator, Optional, Union
+import diskcache
+import httpx
+
+# Endpoints whose responses are reused when an identical request is sent again
+_CACHED_PATH_SUFFIXES = ("/chat/completions",)
+
+# Headers describing how the body was framed, which the replayed body gets anew
+_FRAMING_HEADERS = {"content-length", "transfer-encoding"}
+
+# Last event of a complete chat completion stream
+_STREAM_END = b"data: [DONE]"
+
+def open_cache(directory: str) -> diskcache.Cache:
+    """Open (creating if needed) the response cache stored in directory."""
+    return diskcache.Cache(directory)
+
+def _is_cacheable(request: httpx.Request) -> bool:
+    """Only POSTs to the cached endpoints are looked up."""
+    return request.method == "POST" and request.url.path.endswith(_CACHED_PATH_SUFFIXES)
+
+def _is_streamed(request: httpx.Request) -> bool:
+    """Whether the request asks for its reply as a server-sent event stream."""
+    try:
+        return bool(json.loads(request.content).get("stream"))
+    except (ValueError, AttributeError):
+        return False
+
+def _prepare(request: httpx.Request):
+    """
+    Read the request body, and ask for streamed replies uncompressed: the cache
+    then sees the events as sent and can tell when a stream has ended.
+    """
+    request.read()
+    if _is_streamed(request):
+        request.headers["accept-encoding"] = "identity"
+
+def request_key(request: httpx.Request) -> str:
+    """
+    SHA256 of the request URL and body.
+    The body holds the model, messages and sampling parameters, so identical prompts share a key.
+    """
+    digest = hashlib.sha256(str(request.url).encode())
+    digest.update(request.content)
+    return digest.hexdigest()
+
+def _entry(response: httpx.Response, body: bytes) -> tuple:
+    """
+    Cache entry for a response and its body as received, still content-encoded;
+    the content-encoding header is kept so the replay decodes it again.
+    """
+    headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _FRAMING_HEADERS]
+    return response.status_code, headers, body
+
+class _BodyCopy:
+    """
+    Copy of a response body taken as the caller reads it, stored once the body is complete:
+    read to the end, or for event streams up to the end event (the SDK stops reading
+    there). Streams the caller closes early (e.g. a stalled or repeating reply) are not cached.
+    """
+
+    def __init__(self, store: Callable[[bytes], None]):
+        self._store = store
+        self._chunks = []
+
+    def add(self, chunk: bytes):
+        self._chunks.append(chunk)
+
+    def finish(self, complete: bool):
+        if self._store is None:
+            return
+        body = b"".join(self._chunks)
+        if complete or body.rstrip().endswith(_STREAM_END):
+            self._store(body)
+        self._store = None
+
+class _CachingStream(httpx.SyncByteStream):
+    """Response body passed through to the caller chunk by chunk while a _BodyCopy is taken."""
+
+    def __init__(self, stream: httpx.SyncByteStream, store: Callable[[bytes], None]):
+        self._stream = stream
+        self._copy = _BodyCopy(store)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            self._copy.add(chunk)
+            yield chunk
+        self._copy.finish(complete=True)
+
+    def close(self):
+        self._copy.finish(complete=False)
+        self._stream.close()
+
+class _AsyncCachingStream(httpx.AsyncByteStream):
+    """Async variant of _CachingStream."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, store: Callable[[bytes], None]):
+        self._stream = stream
+        self._copy = _BodyCopy(store)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._copy.add(chunk)
+            yield chunk
+        self._copy.finish(complete=True)
+
+    async def aclose(self):
+        self._copy.finish(complete=False)
+        await self._stream.aclose()
+
+def _passthrough(response: httpx.Response, stream: Union[httpx.SyncByteStream, httpx.AsyncByteStream],
+                 request: httpx.Request) -> httpx.Response:
+    """Response handed to the caller in place of response, reading its body through stream."""
+    return httpx.Response(response.status_code, headers=response.headers, stream=stream,
+                          request=request, extensions=response.extensions)
+
+def _replay(entry: tuple, request: httpx.Request) -> httpx.Response:
+    """Rebuild a response from a cache entry."""
+    status_code, headers, content = entry
+    return httpx.Response(status_code, headers=headers, content=content, request=request)
+
+class CachingTransport(httpx.BaseTransport):
+    """httpx transport that serves repeated chat completion requests from the cache."""
+
+    def __init__(self, transport: httpx.BaseTransport, cache: diskcache.Cache, expire: Optional[float] = None):
+        self._transport = transport
+        self._cache = cache
+        self._expire = expire  # Seconds an entry is kept, None for no expiry
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not _is_cacheable(request):
+            return self._transport.handle_request(request)
+
+        _prepare(request)
+        key = request_key(request)
+        entry = self._cache.get(key)
+        if entry is not None:
+            return _replay(entry, request)
+        
+        response = self._transport.handle_request(request)
+        if response.status_code != 200:
+            return response
+        # The body reaches the caller as it arrives, so streamed replies are not held back
+        def store(body: bytes):
+            self._cache.set(key, _entry(response, body), expire=self._expire)
+        return _passthrough(response, _CachingStream(response.stream, store), request)
+
+    def close(self):
+        self._transport.close()
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """Async variant of CachingTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: diskcache.Cache, expire: Optional[float] = None):
+        self._transport = transport
+        self._cache = cache
+        self._expire = expire  # Seconds an entry is kept, None for no expiry
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not _is_cacheable(request):
+            return await self._transport.handle_async_request(request)
+
+        await request.aread()
+        _prepare(request)
+        key = request_key(request)
+        entry = self._cache.get(key)
+        if entry is not None:
+            return _replay(entry, request)
+        
+        response = await self._transport.handle_async_request(request)
+        if response.status_code != 200:
+            return response
+        def store(body: bytes):
+            self._cache.set(key, _entry(response, body), expire=self._expire)
+        return _passthrough(response, _AsyncCachingStream(response.stream, store), request)
+
+    async def aclose(self):
+        await self._transport.aclose()
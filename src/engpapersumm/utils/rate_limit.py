@@ -0,0 +1,107 @@
+"""Proactive throttling of OpenAI requests using the rate-limit headers of earlier responses."""
+
+import asyncio
+import json
+import re
+import time
+from typing import Optional
+import httpx
+
+# Endpoints whose requests count against the request and token limits
+_THROTTLED_PATH_SUFFIXES = ("/chat/completions",)
+
+# Durations in the reset headers look like "1s", "6m0s" or "20ms"
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_reset(value: str) -> float:
+    """Seconds until a limit resets, from an x-ratelimit-reset-* header."""
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in _DURATION_RE.findall(value))
+
+def estimate_tokens(request: httpx.Request) -> int:
+    """
+    Tokens a chat completion request counts against the limit: roughly 4 bytes of
+    body per prompt token, plus the requested max_tokens.
+    """
+    try:
+        max_tokens = json.loads(request.content).get("max_tokens") or 0
+    except ValueError:
+        max_tokens = 0
+    return len(request.content) // 4 + max_tokens
+
+class _Limit:
+    """Remaining headroom of one limit and when it resets, as last reported by the API."""
+
+    def __init__(self):
+        self.remaining: Optional[int] = None  # Unknown until the first response
+        self.reset_at = 0.0
+
+    def update(self, remaining: Optional[str], reset: Optional[str]):
+        if remaining is None:
+            return
+        self.remaining = int(remaining)
+        self.reset_at = time.monotonic() + (parse_reset(reset) if reset else 0.0)
+
+    def delay(self, cost: int) -> float:
+        """Seconds to wait before cost more can be spent (0 if it fits now)."""
+        if self.remaining is None:
+            return 0.0
+        now = time.monotonic()
+        if now >= self.reset_at:
+            # The window has reset; the next response reports the new headroom
+            self.remaining = None
+            return 0.0
+        return self.reset_at - now if self.remaining < cost else 0.0
+
+    def reserve(self, cost: int):
+        """Count cost against the headroom until the next response reports it."""
+        if self.remaining is not None:
+            self.remaining -= cost
+
+class RateLimiter:
+    """
+    Shared view of the account's request and token headroom.
+
+    Requests that would exceed the remaining headroom wait for the limit to reset
+    instead of being sent and rejected with a 429. Concurrent requests reserve their
+    estimated cost, so they do not all spend the same headroom.
+    """
+
+    def __init__(self):
+        self.requests = _Limit()
+        self.tokens = _Limit()
+
+    async def acquire(self, tokens: int):
+        """Wait until one more request of tokens estimated tokens fits within the limits."""
+        while True:
+            delay = max(self.requests.delay(1), self.tokens.delay(tokens))
+            if delay <= 0:
+                self.requests.reserve(1)
+                self.tokens.reserve(tokens)
+                return
+            await asyncio.sleep(delay)
+
+    def update(self, headers: httpx.Headers):
+        """Record the headroom reported by a response."""
+        self.requests.update(headers.get("x-ratelimit-remaining-requests"), headers.get("x-ratelimit-reset-requests"))
+        self.tokens.update(headers.get("x-ratelimit-remaining-tokens"), headers.get("x-ratelimit-reset-tokens"))
+
+class AsyncRateLimitTransport(httpx.AsyncBaseTransport):
+    """httpx transport that holds back chat completion requests the rate limits cannot take."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter):
+        self._transport = transport
+        self._limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith(_THROTTLED_PATH_SUFFIXES):
+            return await self._transport.handle_async_request(request)
+
+        await request.aread()
+        await self._limiter.acquire(estimate_tokens(request))
+        response = await self._transport.handle_async_request(request)
+        self._limiter.update(response.headers)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
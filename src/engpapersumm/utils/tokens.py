@@ -0,0 +1,74 @@
+"""Token counting utilities for budgeting LLM requests."""
+
+from functools import lru_cache
+from typing import List, Optional
+import tiktoken
+
+# Encoding used for models tiktoken does not know about
+_DEFAULT_ENCODING = "o200k_base"
+
+# Characters per token assumed when no tiktoken encoding can be loaded
+_CHARS_PER_TOKEN = 4
+
+class _ApproximateEncoding:
+    """Fallback encoding that counts every few characters as one token."""
+    name = "approximate"
+    
+    def encode(self, text: str) -> list:
+        return [text[i:i + _CHARS_PER_TOKEN] for i in range(0, len(text), _CHARS_PER_TOKEN)]
+    
+    def decode(self, tokens: list) -> str:
+        return "".join(tokens)
+
+@lru_cache(maxsize=4)
+def get_encoding(model: str):
+    """Return the (cached) tiktoken encoding for a model."""
+    try:
+        encoding_name = tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        encoding_name = _DEFAULT_ENCODING
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        # The encoding files are downloaded on first use, which fails offline
+        print(f"Could not load tiktoken encoding '{encoding_name}': {e}. Approximating token counts.")
+        return _ApproximateEncoding()
+
+def count_tokens(text: str, model: str) -> int:
+    """Count the tokens text uses for the given model."""
+    return len(get_encoding(model).encode(text))
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Truncate text to at most max_tokens tokens for the given model."""
+    if len(text) <= max_tokens:
+        return text  # Every token covers at least one character
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+def split_by_tokens(text: str, max_tokens: int, model: str, overlap: int = 0) -> List[str]:
+    """
+    Split text into chunks of max_tokens tokens for the given model. Each chunk after
+    the first is preceded by the last overlap tokens of the one before, so text cut
+    at a chunk boundary keeps its context; there are ceil(tokens / max_tokens) chunks.
+    """
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text)
+    return [encoding.decode(tokens[max(0, start - overlap):start + max_tokens])
+            for start in range(0, len(tokens), max_tokens)]
+
+def single_token_ids(texts: List[str], model: str) -> Optional[List[int]]:
+    """
+    Return the token id of each text for the given model, or None unless every
+    text is exactly one token (or no tiktoken encoding could be loaded).
+    """
+    ids = []
+    for text in texts:
+        tokens = get_encoding(model).encode(text)
+        if len(tokens) != 1 or not isinstance(tokens[0], int):
+            return None
+        ids.append(tokens[0])
+    return ids
+
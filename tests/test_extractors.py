@@ -6,6 +6,20 @@ import tempfile
 import PyPDF2
 from unittest.mock import patch, mock_open
 from engpapersumm.extractors import pdf, section
+from engpapersumm.utils import tokens
+
+def _write_pdf(pdf_path, num_pages):
+    """Write a simple multi-page PDF for extraction tests."""
+    from reportlab.pdfgen.canvas import Canvas
+    
+    canvas = Canvas(str(pdf_path))
+    canvas.setTitle("Long Paper")
+    for i in range(num_pages):
+        canvas.drawString(72, 720, f"Page {i} text")
+        canvas.drawString(72, 700, "continues here")
+        canvas.showPage()
+    canvas.save()
+    return pdf_path
 
 class TestPdfExtractor:
     """Tests for PDF extraction utilities."""
@@ -16,15 +30,18 @@ class TestPdfExtractor:
             # Create some test files
             Path(f"{tmp_dir}/test1.pdf").touch()
             Path(f"{tmp_dir}/test2.pdf").touch()
+            Path(f"{tmp_dir}/TEST3.PDF").touch()
             Path(f"{tmp_dir}/not_pdf.txt").touch()
+            Path(f"{tmp_dir}/folder.pdf").mkdir()
             
             # Test the function
             pdfs = pdf.list_pdfs(Path(tmp_dir))
             
             # Assert we get the right files
-            assert len(pdfs) == 2
+            assert len(pdfs) == 3
             assert any(p.name == "test1.pdf" for p in pdfs)
             assert any(p.name == "test2.pdf" for p in pdfs)
+            assert any(p.name == "TEST3.PDF" for p in pdfs)
             assert not any(p.name == "not_pdf.txt" for p in pdfs)
     
     def test_list_pdfs_single_file(self):
@@ -52,4 +69,107 @@ class TestPdfExtractor:
             pdfs = pdf.list_pdfs(test_file)
             
             # Assert we get an empty list
-            assert len(pdfs) == 0
\ No newline at end of file
+            assert len(pdfs) == 0
+    
+    def test_extract_text_parallel_matches_sequential(self):
+        """Test parallel PyPDF2 page extraction returns the same text as sequential extraction."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = _write_pdf(Path(f"{tmp_dir}/long.pdf"), pdf.PARALLEL_MIN_PAGES + 5)
+            
+            with patch.object(pdf, "pypdfium2", None):
+                sequential = pdf.extract_text_and_title(pdf_path, max_workers=1)
+                parallel = pdf.extract_text_and_title(pdf_path, max_workers=2)
+            
+            assert parallel == sequential
+            assert sequential[1] == "Long Paper"
+            assert "Page 0 text continues here" in sequential[0]
+    
+    @pytest.mark.skipif(pdf.pypdfium2 is None, reason="pypdfium2 not installed")
+    def test_extract_text_pdfium(self):
+        """Test pypdfium2 extraction reads the title and the text of every page."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = _write_pdf(Path(f"{tmp_dir}/paper.pdf"), 3)
+            
+            text, title = pdf.extract_text_and_title(pdf_path)
+            
+            assert title == "Long Paper"
+            assert all(f"Page {i} text continues here" in text for i in range(3))
+    
+    def test_extract_text_on_lead(self):
+        """Test on_lead gets the leading pages once, matching the start of the full text with both backends."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = _write_pdf(Path(f"{tmp_dir}/paper.pdf"), 5)
+            
+            for backend in (None, pdf.pypdfium2):
+                leads = []
+                with patch.object(pdf, "pypdfium2", backend):
+                    text, _ = pdf.extract_text_and_title(pdf_path, max_workers=1,
+                                                         on_lead=lambda *lead: leads.append(lead))
+                
+                assert len(leads) == 1
+                lead_text, title = leads[0]
+                assert title == "Long Paper"
+                assert text.startswith(lead_text)
+                assert "Page 1 text" in lead_text and "Page 2 text" not in lead_text
+    
+    def test_extract_text_on_lead_short_paper(self):
+        """Test on_lead still gets the whole text of a paper shorter than LEAD_PAGES."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = _write_pdf(Path(f"{tmp_dir}/paper.pdf"), 1)
+            leads = []
+            
+            with patch.object(pdf, "pypdfium2", None):
+                text, title = pdf.extract_text_and_title(pdf_path, on_lead=lambda *lead: leads.append(lead))
+            
+            assert leads == [(text, title)]
+
+class TestSectionExtractor:
+    """Tests for abstract and section extraction."""
+    
+    ABSTRACT = "We present a method for speeding up inference with caching across many GPUs in clusters."
+    
+    def test_extract_abstract_heading(self):
+        """Test an abstract under its own heading is extracted and whitespace collapsed."""
+        text = f"Title\nAbstract\n{self.ABSTRACT}\n\n1. Introduction\nText"
+        assert section.extract_abstract(text) == self.ABSTRACT
+    
+    def test_extract_abstract_until_introduction(self):
+        """Test a short first paragraph falls through to the abstract running until the introduction."""
+        text = f"Abstract\nShort one.\n\n{self.ABSTRACT}\n\nIntroduction\nText"
+        assert section.extract_abstract(text) == f"Short one. {self.ABSTRACT}"
+    
+    def test_extract_abstract_missing(self):
+        """Test the first paragraph is used when there is no abstract."""
+        text = "no heading here " * 40
+        assert section.extract_abstract(text) == text[:500]
+    
+    def test_detect_sections(self):
+        """Test numbered headers split the text into titled sections."""
+        body = "Measured latency drops sharply with caching. " * 30
+        text = f"Paper\n\n1. Introduction\n{body}\n\n2. Results\n{body}"
+        
+        sections = section.detect_sections(text, ["introduction", "results"], 10_000, "gpt-4o")
+        
+        assert [s['title'] for s in sections] == ["Introduction", "Results"]
+        assert sections[0]['content'] == body.strip()
+    
+    def test_build_paper_excerpt(self):
+        """Test the excerpt keeps the abstract, section openings and the conclusion within budget."""
+        intro = "Caching speeds up inference. " + "Background on clusters. " * 200
+        results = "Latency drops by half. " + "More measurements follow. " * 200
+        conclusion = "Caching is worth deploying. " * 40
+        text = (f"Paper\n\nAbstract\n{self.ABSTRACT}\n\n1. Introduction\n{intro}\n\n"
+                f"2. Results\n{results}\n\n3. Conclusion\n{conclusion}\n\nReferences\n" + "[1] A. Author. " * 100)
+        patterns = ["introduction", "results", "conclusion", "references"]
+        
+        with patch("engpapersumm.utils.tokens.get_encoding", return_value=tokens._ApproximateEncoding()):
+            sections = section.detect_sections(text, patterns, 10_000, "gpt-4o")
+            excerpt = section.build_paper_excerpt(text, sections, 1000, "gpt-4o")
+            assert tokens.count_tokens(excerpt, "gpt-4o") <= 1000
+        
+        assert excerpt.startswith(f"Abstract: {self.ABSTRACT}")
+        assert "## Introduction\nCaching speeds up inference." in excerpt
+        assert "## Results\nLatency drops by half." in excerpt
+        assert conclusion.strip() in excerpt
+        assert "A. Author" not in excerpt
+
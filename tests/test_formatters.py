@@ -0,0 +1,97 @@
+"""Test PDF formatting functionality."""
+
+from pathlib import Path
+import tempfile
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph
+from engpapersumm.formatters import pdf
+
+def _styles():
+    """Map each markdown role to a distinct sample style so tests can tell them apart."""
+    sample = getSampleStyleSheet()
+    return {
+        'heading': sample['Heading1'],
+        'subheading': sample['Heading2'],
+        'body': sample['BodyText'],
+        'bullet': sample['Bullet'],
+        'fallback': sample['Normal'],
+    }
+
+class TestMarkdownEmitter:
+    """Tests for converting markdown into reportlab flowables."""
+    
+    def _render(self, text, **kwargs):
+        story = []
+        pdf.emit_markdown(story, text, _styles(), **kwargs)
+        return [(f.style.name, f.text) for f in story if isinstance(f, Paragraph)]
+    
+    def test_headings(self):
+        """Test markdown and pseudo headings are mapped to heading styles."""
+        rendered = self._render("## Overview\n### Details:\n**Bold Title**\nResults:\n")
+        assert rendered == [
+            ('Heading1', 'Overview'),
+            ('Heading2', 'Details'),
+            ('Heading1', 'Bold Title'),
+            ('Heading1', 'Results'),
+        ]
+    
+    def test_bold_lead_in_is_not_heading(self):
+        """Test a line that only starts with bold text stays a paragraph."""
+        rendered = self._render("**Note** caching helps\n**Also** bold**")
+        assert rendered == [('BodyText', 'Note caching helps'), ('Heading1', 'Also bold')]
+    
+    def test_heading_prefixes(self):
+        """Test lines starting with a configured prefix become headings."""
+        rendered = self._render("Key Insight: speed\nKey point without colon", heading_prefixes=("Key ",))
+        assert rendered == [('Heading1', 'Key Insight: speed'), ('BodyText', 'Key point without colon')]
+    
+    def test_bullets_and_continuations(self):
+        """Test bullet markers are stripped and continuation lines are joined."""
+        rendered = self._render("- first\n  still first\n* second\n1. third\n\nAfter list")
+        assert rendered == [
+            ('Bullet', '• first still first'),
+            ('Bullet', '• second'),
+            ('Bullet', '• third'),
+            ('BodyText', 'After list'),
+        ]
+    
+    def test_headed_list_items_are_headings(self):
+        """Test numbered and dashed lines ending with a colon become headings, keeping their marker."""
+        rendered = self._render("1. Breakthrough Insights:\n- faster\n- Why It Matters:\nCheaper serving")
+        assert rendered == [
+            ('Heading1', '1. Breakthrough Insights'),
+            ('Bullet', '• faster'),
+            ('Heading1', '- Why It Matters'),
+            ('BodyText', 'Cheaper serving'),
+        ]
+    
+    def test_paragraphs_are_joined_and_sanitized(self):
+        """Test consecutive lines form one sanitized paragraph."""
+        rendered = self._render("Fast <b>and</b>\ncheap & good\n\nNext")
+        assert rendered == [('BodyText', 'Fast and cheap &amp; good'), ('BodyText', 'Next')]
+
+    def test_crlf_line_endings(self):
+        """Test CRLF text is split into the same blocks as LF text."""
+        text = "## Title\n- item\n\nFirst para\nstill first\n\nSecond para\n"
+        assert self._render(text.replace("\n", "\r\n")) == self._render(text)
+
+class TestWriteSummaryPdf:
+    """Tests for writing the summary PDF."""
+    
+    def test_write_summary_pdf(self):
+        """Test a PDF is produced for all three sections."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_file = Path(tmp_dir) / "summary.pdf"
+            pdf.write_summary_pdf(out_file, "Title", "## Summary\nText", "- takeaway", "Practical Uses: x")
+            assert out_file.read_bytes().startswith(b"%PDF")
+
+class TestSanitizeText:
+    """Tests for sanitizing text before it is handed to reportlab."""
+    
+    def test_typographic_characters(self):
+        """Test curly quotes and dashes are replaced with plain ASCII."""
+        assert pdf.sanitize_text("‘a’ “b” — –") == "'a' \"b\" - -"
+    
+    def test_tags_and_escapes(self):
+        """Test tags are stripped, images replaced and special characters escaped."""
+        assert pdf.sanitize_text('<img src="x"> <i>R&D</i> **bold**') == "[IMAGE] R&amp;D bold"
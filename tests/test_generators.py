@@ -0,0 +1,49 @@
+"""Test summary generation functionality."""
+
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from engpapersumm.generators import summary
+
+def _reply(content):
+    """Build a minimal chat completion response carrying content."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class TestBatchSummarize:
+    """Tests for summarizing several sections in one request."""
+
+    SECTIONS = [
+        {'title': "Introduction", 'content': "intro text", 'topic_guidance': "Focus on these key topics: caching"},
+        {'title': "Results", 'content': "results text", 'topic_guidance': "Focus on these key topics: caching"},
+    ]
+
+    def test_summaries_follow_section_order(self):
+        """Test that each batched summary is paired with its section."""
+        client = MagicMock()
+        client.chat.completions.create.return_value = _reply(json.dumps({"summaries": [
+            {"title": "Introduction", "content": " Intro summary "},
+            {"title": "Results", "content": "Results summary"},
+        ]}))
+
+        result = summary.batch_summarize_sections(client, self.SECTIONS, "gpt-4o")
+
+        assert result == [
+            {'title': "Introduction", 'content': "Intro summary"},
+            {'title': "Results", 'content': "Results summary"},
+        ]
+        request = client.chat.completions.create.call_args.kwargs
+        assert request["response_format"] == {"type": "json_object"}
+        user_message = request["messages"][1]["content"]
+        assert user_message.count("Focus on these key topics") == 1
+        assert "results text" in user_message
+
+    def test_missing_summaries_raise(self):
+        """Test that an incomplete reply raises so the caller can fall back."""
+        client = MagicMock()
+        client.chat.completions.create.return_value = _reply(json.dumps({"summaries": [
+            {"title": "Introduction", "content": "Intro summary"}
+        ]}))
+
+        with pytest.raises(ValueError):
+            summary.batch_summarize_sections(client, self.SECTIONS, "gpt-4o")
@@ -0,0 +1,197 @@
+"""Test section processing functionality."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from engpapersumm.processors import coherence, topic, validation
+from engpapersumm.utils import tokens
+
+def _reply(content):
+    """Build a minimal chat completion response carrying content."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def _sections(count):
+    """Build count placeholder sections."""
+    return [{'title': f"Section {i}", 'content': f"content {i}"} for i in range(count)]
+
+class TestTitleValidation:
+    """Tests for title-relevance validation."""
+
+    def test_async_validation_filters_low_scores(self):
+        """Test that concurrently scored sections are filtered like the sync path."""
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(side_effect=[
+            _reply("9"), _reply("2"), _reply("7"), _reply("8")
+        ])
+        sections = _sections(4)
+
+        result = asyncio.run(validation.validate_content_against_title_async(client, "Title", sections, "gpt-4o"))
+
+        assert client.chat.completions.create.await_count == 4
+        assert [s['title'] for s in result] == ["Section 0", "Section 2", "Section 3"]
+        assert sections[1]['title_relevance'] == 2.0
+
+    def test_async_validation_keeps_failed_sections(self):
+        """Test that a failed request includes its section by default."""
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(side_effect=[_reply("9"), RuntimeError("boom")])
+
+        result = asyncio.run(validation.validate_content_against_title_async(client, "Title", _sections(2), "gpt-4o"))
+
+        assert [s['title'] for s in result] == ["Section 0", "Section 1"]
+
+    def test_sync_and_async_agree(self):
+        """Test that both variants keep the top 3 sections when too many are filtered."""
+        scores = ["1", "5", "3", "4"]
+        sync_client = MagicMock()
+        sync_client.chat.completions.create.side_effect = [_reply(s) for s in scores]
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(side_effect=[_reply(s) for s in scores])
+
+        sync_result = validation.validate_content_against_title(sync_client, "Title", _sections(4), "gpt-4o")
+        async_result = asyncio.run(
+            validation.validate_content_against_title_async(async_client, "Title", _sections(4), "gpt-4o")
+        )
+
+        assert [s['title'] for s in sync_result] == ["Section 1", "Section 3", "Section 2"]
+        assert [s['title'] for s in async_result] == [s['title'] for s in sync_result]
+
+    def test_prefilter_skips_clear_sections(self):
+        """Test that only sections the TF-IDF prefilter cannot decide are sent to the LLM."""
+        abstract = "We cache attention keys to speed up transformer inference on GPUs."
+        sections = [
+            {'title': "Method", 'content': abstract},
+            {'title': "Recipe", 'content': "Bake bread dough in a hot oven until golden."},
+            {'title': "Evaluation", 'content': "Transformer inference on GPUs is evaluated with batch sizes, "
+                                               "memory bandwidth and throughput benchmarks across clusters."},
+        ]
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=_reply("7"))
+
+        result = asyncio.run(validation.validate_content_against_title_async(
+            client, "Caching for LLM inference", sections, "gpt-4o", abstract=abstract
+        ))
+
+        assert client.chat.completions.create.await_count == 1
+        assert [s['title_relevance'] for s in sections] == [9.0, 2.0, 7.0]
+        assert [s['title'] for s in result] == ["Method", "Evaluation", "Recipe"]  # Top 3 by relevance
+
+    def test_scores_are_forced_to_one_digit_token(self):
+        """Test that the scoring request allows a single token biased towards the digits."""
+        class DigitEncoding:
+            def encode(self, text):
+                return [1000 + int(text)] if text.isdigit() else list(text)
+
+        client = MagicMock()
+        client.chat.completions.create.return_value = _reply("8")
+        validation._score_logit_bias.cache_clear()
+        try:
+            with patch("engpapersumm.utils.tokens.get_encoding", return_value=DigitEncoding()):
+                validation.validate_content_against_title(client, "Title", _sections(1), "gpt-4o-mini")
+        finally:
+            validation._score_logit_bias.cache_clear()
+
+        request = client.chat.completions.create.call_args.kwargs
+        assert request["max_tokens"] == 1
+        assert request["logit_bias"] == {str(1000 + digit): 100 for digit in range(10)}
+
+    def test_prompts_are_token_budgeted(self):
+        """Test that long section content is cut to the token budget, not a character count."""
+        client = MagicMock()
+        client.chat.completions.create.return_value = _reply('{"topics": [["caching"]]}')
+        sections = [{'title': "Body", 'content': "abcd" * 10_000}]
+
+        with patch("engpapersumm.utils.tokens.get_encoding", return_value=tokens._ApproximateEncoding()):
+            assert validation.perform_topic_modeling(client, sections, "gpt-4o-mini") == [["caching"]]
+
+        prompt = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert "abcd" * validation.TOPIC_MODELING_TOKENS in prompt
+        assert "abcd" * (validation.TOPIC_MODELING_TOKENS + 1) not in prompt
+
+class TestContentCoherence:
+    """Tests for outlier removal between sections."""
+
+    def test_removes_outlier_section(self):
+        """Test that a section unrelated to the others is dropped."""
+        sections = [
+            {'title': "Intro", 'content': "neural network training with gradient descent and large datasets"},
+            {'title': "Method", 'content': "we train the neural network using gradient descent on datasets"},
+            {'title': "Results", 'content': "the trained neural network converges quickly with gradient descent"},
+            {'title': "Recipe", 'content': "bake the bread dough at high oven temperature until golden"},
+        ]
+
+        result = coherence.ensure_content_coherence(sections)
+
+        assert [s['title'] for s in result] == ["Intro", "Method", "Results"]
+
+    def test_keeps_coherent_sections(self):
+        """Test that sections sharing a theme are all kept."""
+        sections = [
+            {'title': "Part 0", 'content': "neural network training with gradient descent"},
+            {'title': "Part 1", 'content': "gradient descent tunes the neural network weights"},
+            {'title': "Part 2", 'content': "neural network training needs a good learning rate"},
+        ]
+
+        assert coherence.ensure_content_coherence(sections) == sections
+
+    def test_merges_duplicate_sections(self):
+        """Test that near-identical sections are merged into the first, keeping new sentences."""
+        sections = [
+            {'title': "Introduction", 'content': "Neural networks learn features from data. "
+                                                 "Gradient descent trains the network weights."},
+            {'title': "Method", 'content': "We train neural networks with gradient descent on large datasets."},
+            {'title': "Conclusion", 'content': "Neural networks learn features from data. "
+                                               "Gradient descent trains the network weights. Networks learn!"},
+        ]
+
+        result = coherence.ensure_content_coherence(sections)
+
+        assert [s['title'] for s in result] == ["Introduction", "Method"]
+        assert result[0]['content'] == ("Neural networks learn features from data. "
+                                        "Gradient descent trains the network weights. Networks learn!")
+
+class TestTopicFiltering:
+    """Tests for topic relevance scoring."""
+
+    def test_batch_scores_match_single_text(self):
+        """Test that scoring one text alone matches the single-text helper."""
+        topics = {"neural network": 1.0, "gradient descent": 0.5}
+        text = "The neural network is trained with gradient descent."
+
+        assert topic.compute_topic_similarities(topics, [text]) == [topic.compute_topic_similarity(topics, text)]
+
+    def test_filter_irrelevant_sections(self):
+        """Test that off-topic sections are filtered and scores are attached."""
+        topics = {"neural network": 1.0, "gradient descent": 0.8}
+        sections = [
+            {'title': "Method", 'content': "the neural network is trained using gradient descent"},
+            {'title': "Results", 'content': "gradient descent trains the neural network well"},
+            {'title': "Analysis", 'content': "each neural network layer follows gradient descent updates"},
+            {'title': "Acknowledgements", 'content': "we thank our funding agency and colleagues"},
+        ]
+
+        result = topic.filter_irrelevant_sections(sections, topics, 0.01)
+
+        assert [s['title'] for s in result] == ["Method", "Results", "Analysis"]
+        assert sections[3]['topic_similarity'] == 0.0
+
+    def test_empty_topics(self):
+        """Test that every text scores zero without topics."""
+        assert topic.compute_topic_similarities({}, ["some text", ""]) == [0.0, 0.0]
+
+    def test_extract_paper_topic_parses_json(self):
+        """Test that the topic response is parsed as JSON."""
+        client = MagicMock()
+        client.chat.completions.create.return_value = _reply('{"neural networks": 0.9, "optimizers": 0.5}')
+
+        assert topic.extract_paper_topic(client, "Title", "Abstract", "gpt-4o") == {
+            "neural networks": 0.9, "optimizers": 0.5
+        }
+
+    def test_extract_paper_topic_rejects_code(self):
+        """Test that a non-JSON response falls back to the title instead of being executed."""
+        client = MagicMock()
+        client.chat.completions.create.return_value = _reply('__import__("os").getcwd()')
+
+        assert topic.extract_paper_topic(client, "Some Title", "Abstract", "gpt-4o") == {"some title": 1.0}
+
@@ -1,49 +1,87 @@
 """Test the PaperSummarizer class."""
 
+import os
 import pytest
+
+# Skip the module without an API key before importing the summarizer and its dependencies
+if os.environ.get("OPENAI_API_KEY") is None:
+    pytest.skip("OPENAI_API_KEY environment variable not set", allow_module_level=True)
+
+import asyncio
+import diskcache
+import httpx
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from unittest.mock import patch, MagicMock
-import os
+from unittest.mock import DEFAULT, patch, AsyncMock, MagicMock
+from tenacity import wait_none
 from engpapersumm import PaperSummarizer
+from engpapersumm.generators.takeaways import generate_key_takeaways_async
+from engpapersumm.utils import llm
 
 # Sample configuration for testing
 TEST_CONFIG = {
-    "CHUNK_SIZE": 5000,
+    "CHUNK_TOKENS": 1000,
     "MIN_SIMILARITY": 0.1,
-    "LLM_MODEL": "gpt-4o"
+    "LLM_MODEL": "gpt-4o",
+    "CHUNKS_PER_REQUEST": 4,
+    "MAX_WORKERS": 1,  # Keep summarize_file in-process so it can be mocked
+    "CACHE_DIR": None  # Keep the tests off the user's response cache
 }
 
-# Skip tests if OPENAI_API_KEY is not set
-pytestmark = pytest.mark.skipif(
-    os.environ.get("OPENAI_API_KEY") is None,
-    reason="OPENAI_API_KEY environment variable not set"
-)
-
 class TestPaperSummarizer:
     """Tests for the PaperSummarizer class."""
     
     def test_init(self):
         """Test initializing the summarizer."""
         summarizer = PaperSummarizer(config=TEST_CONFIG)
-        assert summarizer.config["CHUNK_SIZE"] == 5000
+        assert summarizer.config["CHUNK_TOKENS"] == 1000
         assert summarizer.config["MIN_SIMILARITY"] == 0.1
         assert summarizer.config["LLM_MODEL"] == "gpt-4o"
+        assert summarizer.config["CHUNKS_PER_REQUEST"] == 4
     
-    @patch("engpapersumm.summarizer.extract_text_and_title")
-    @patch("engpapersumm.summarizer.generate_key_takeaways")
-    @patch("engpapersumm.summarizer.generate_engineers_corner")
-    @patch("engpapersumm.summarizer.write_summary_pdf")
-    def test_summarize_file(self, mock_write_pdf, mock_engineers_corner, 
-                          mock_takeaways, mock_extract):
+    def test_init_reuses_client(self, tmp_path):
+        """Test that summarizers with the same settings share one client and response cache, and all share the writers."""
+        a = PaperSummarizer(config=TEST_CONFIG)
+        b = PaperSummarizer(config={**TEST_CONFIG, "LLM_MODEL": "gpt-4o-mini"})
+        c = PaperSummarizer(config={**TEST_CONFIG, "CACHE_DIR": str(tmp_path)})
+        
+        assert a.client is b.client
+        assert c.client is not a.client
+        assert c.cache is not None and a.cache is None
+        assert a._writer_pool is b._writer_pool is c._writer_pool
+    
+    @pytest.fixture
+    def file_mocks(self, mocker):
+        """Patch the extraction, generation and writing steps of summarize_file in one call."""
+        return mocker.patch.multiple(
+            "engpapersumm.summarizer",
+            extract_paper_topic_async=DEFAULT,
+            extract_text_and_title=DEFAULT,
+            generate_key_takeaways_async=DEFAULT,
+            generate_engineers_corner_async=DEFAULT,
+            write_summary_pdf=DEFAULT
+        )
+    
+    def test_summarize_file(self, file_mocks):
         """Test summarizing a file."""
-        # Set up mocks
-        mock_extract.return_value = ("Sample text", "Sample Title")
+        # Set up mocks; patch.multiple creates AsyncMocks for the coroutine functions
+        mock_extract = file_mocks["extract_text_and_title"]
+        mock_takeaways = file_mocks["generate_key_takeaways_async"]
+        mock_engineers_corner = file_mocks["generate_engineers_corner_async"]
+        mock_write_pdf = file_mocks["write_summary_pdf"]
+        
+        def extract(pdf_path, max_workers, on_lead):
+            on_lead("Sample", "Sample Title")
+            return "Sample text", "Sample Title"
+        mock_extract.side_effect = extract
+        file_mocks["extract_paper_topic_async"].return_value = {"sample": 1.0}
         mock_takeaways.return_value = "Key takeaways"
         mock_engineers_corner.return_value = "Engineers corner"
         
-        # Create summarizer with mocked _hierarchical_summarize
+        # Create summarizer with mocked _hierarchical_summarize_async
         summarizer = PaperSummarizer(config=TEST_CONFIG)
-        summarizer._hierarchical_summarize = MagicMock(return_value="Summary")
+        summarizer._hierarchical_summarize_async = AsyncMock(return_value="Summary")
         
         # Test
         pdf_path = Path("test.pdf")
@@ -51,39 +89,478 @@ class TestPaperSummarizer:
         result = summarizer.summarize_file(pdf_path, output_dir)
         
         # Assertions
-        mock_extract.assert_called_once_with(pdf_path)
-        summarizer._hierarchical_summarize.assert_called_once()
-        mock_takeaways.assert_called_once()
-        mock_engineers_corner.assert_called_once()
+        mock_extract.assert_called_once()
+        assert mock_extract.call_args.args == (pdf_path,)
+        assert file_mocks["extract_paper_topic_async"].await_args.args[1] == "Sample Title"
+        summarizer._hierarchical_summarize_async.assert_awaited_once()
+        assert summarizer._hierarchical_summarize_async.await_args.args[2].result() == {"sample": 1.0}
+        mock_takeaways.assert_awaited_once()
+        mock_engineers_corner.assert_awaited_once()
         mock_write_pdf.assert_called_once()
-        assert result == output_dir / "Sample_Title-engineering-summary.pdf"
+        assert result == output_dir / "Sample Title-engineering-summary.pdf"
     
-    @patch("engpapersumm.summarizer.list_pdfs")
-    def test_summarize_directory(self, mock_list_pdfs):
-        """Test summarizing a directory of files."""
-        # Set up mock
-        mock_list_pdfs.return_value = [Path("test1.pdf"), Path("test2.pdf")]
+    def test_retry_on_rate_limit(self, file_mocks, mocker):
+        """Test that a 429 from the API is retried without failing the paper."""
+        responses = [
+            httpx.Response(429, json={"error": {"message": "Rate limit reached"}}),
+            httpx.Response(200, json={
+                "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Key takeaways"}}]
+            })
+        ]
+        mocker.patch("engpapersumm.summarizer.httpx.AsyncHTTPTransport",
+                     lambda **kwargs: httpx.MockTransport(lambda request: responses.pop(0)))
+        mocker.patch.object(llm.chat_completion_async.retry, "wait", wait_none())
+        file_mocks["extract_text_and_title"].return_value = ("Sample text", "Sample Title")
+        file_mocks["extract_paper_topic_async"].return_value = {"sample": 1.0}
+        mock_takeaways = file_mocks["generate_key_takeaways_async"]
+        mock_takeaways.side_effect = generate_key_takeaways_async
+        file_mocks["generate_engineers_corner_async"].return_value = "Engineers corner"
         
-        # Create summarizer with mocked summarize_file
         summarizer = PaperSummarizer(config=TEST_CONFIG)
-        summarizer.summarize_file = MagicMock(
-            side_effect=[Path("out1.pdf"), Path("out2.pdf")]
-        )
+        summarizer._hierarchical_summarize_async = AsyncMock(return_value="Summary")
+        output_dir = Path("./output")
+        result = summarizer.summarize_file(Path("test.pdf"), output_dir)
+        
+        assert not responses  # The rate-limited request was sent again
+        assert file_mocks["write_summary_pdf"].call_args.args[3] == "Key takeaways"
+        assert result.parent == output_dir
+    
+    def test_write_is_async(self, file_mocks, mocker, tmp_path):
+        """Test that summary PDFs are rendered on the dedicated writer threads, off the default executor."""
+        mocker.patch("engpapersumm.summarizer.list_pdfs", return_value=[Path(f"test{i}.pdf") for i in range(4)])
+        mock_hash = mocker.patch("engpapersumm.summarizer.pdf_sha256", side_effect=lambda pdf_path: pdf_path.stem)
+        file_mocks["extract_text_and_title"].side_effect = lambda pdf_path, **kwargs: ("text", pdf_path.stem)
+        file_mocks["extract_paper_topic_async"].return_value = {"sample": 1.0}
+        file_mocks["generate_key_takeaways_async"].return_value = "Key takeaways"
+        file_mocks["generate_engineers_corner_async"].return_value = "Engineers corner"
+        writer_threads = []
+        file_mocks["write_summary_pdf"].side_effect = \
+            lambda *args: writer_threads.append(threading.current_thread().name)
+        
+        summarizer = PaperSummarizer(config=TEST_CONFIG)
+        summarizer._hierarchical_summarize_async = AsyncMock(return_value="Summary")
+        
+        results = asyncio.run(summarizer.summarize_directory_async(Path("./papers"), tmp_path))
+        
+        assert len(writer_threads) == 4
+        assert all(name.startswith("summary-writer") for name in writer_threads)
+        assert mock_hash.call_count == 4  # Each PDF is hashed once, for the checkpoint and the in-flight key
+        assert results == [tmp_path / f"test{i}-engineering-summary.pdf" for i in range(4)]
+    
+    @pytest.mark.parametrize("pdfs,expected", [
+        ([], []),
+        ([Path("test1.pdf"), Path("test2.pdf")], [Path("out1.pdf"), Path("out2.pdf")])
+    ])
+    def test_summarize_directory(self, pdfs, expected, mocker, tmp_path):
+        """Test summarizing an empty and a non-empty directory of files."""
+        mock_list_pdfs = mocker.patch("engpapersumm.summarizer.list_pdfs", return_value=pdfs)
+        mocker.patch("engpapersumm.summarizer.pdf_sha256", side_effect=lambda pdf_path: pdf_path.stem)
+        
+        # Create summarizer with a fake summarize_file_async; in one process papers run on the event loop.
+        # A plain coroutine function skips the mock bookkeeping, which adds up in larger directories
+        summarizer = PaperSummarizer(config=TEST_CONFIG)
+        outputs = iter(expected)
+        calls = []
+        
+        async def fake_summarize(pdf_path, output_dir, extraction=None, sha=None):
+            calls.append(pdf_path)
+            return next(outputs)
+        summarizer.summarize_file_async = fake_summarize
         
-        # Test
         input_dir = Path("./papers")
-        output_dir = Path("./output")
-        results = summarizer.summarize_directory(input_dir, output_dir)
+        results = summarizer.summarize_directory(input_dir, tmp_path)
         
-        # Assertions
         mock_list_pdfs.assert_called_once_with(input_dir)
-        assert summarizer.summarize_file.call_count == 2
-        assert len(results) == 2
-        assert results == [Path("out1.pdf"), Path("out2.pdf")]
-    
-    def test_empty_directory(self):
-        """Test summarizing an empty directory."""
-        with patch("engpapersumm.summarizer.list_pdfs", return_value=[]):
-            summarizer = PaperSummarizer(config=TEST_CONFIG)
-            results = summarizer.summarize_directory(Path("./empty"))
-            assert results == []
\ No newline at end of file
+        assert calls == pdfs
+        assert results == expected
+    
+    @patch("engpapersumm.summarizer.list_pdfs")
+    @patch("engpapersumm.summarizer.pdf_sha256", side_effect=lambda pdf_path: pdf_path.stem)
+    def test_resume_after_crash(self, mock_hash, mock_list_pdfs, tmp_path):
+        """Test that papers recorded in the checkpoint are skipped and new ones are recorded."""
+        mock_list_pdfs.return_value = [Path("done.pdf"), Path("todo.pdf")]
+        done_summary = tmp_path / "done-summary.pdf"
+        done_summary.touch()
+        checkpoint_path = tmp_path / ".engpapersumm_ckpt.jsonl"
+        # A crash while writing the checkpoint leaves a truncated last line
+        checkpoint_path.write_text(f'{{"sha": "done", "out": "{done_summary}"}}\n{{"sha": "to')
+        
+        summarizer = PaperSummarizer(config=TEST_CONFIG)
+        summarizer.summarize_file_async = AsyncMock(return_value=tmp_path / "todo-summary.pdf")
+        
+        results = summarizer.summarize_directory(Path("./papers"), tmp_path)
+        
+        # The hash computed for the checkpoint is handed over instead of reading the PDF again
+        summarizer.summarize_file_async.assert_awaited_once_with(Path("todo.pdf"), tmp_path, None, sha="todo")
+        assert results == [done_summary, tmp_path / "todo-summary.pdf"]
+        assert f'"sha": "todo", "out": "{tmp_path / "todo-summary.pdf"}"' in checkpoint_path.read_text()
+    
+    def test_async_run_resumes_and_records_despite_failures(self, mocker, tmp_path):
+        """Test that the async directory run skips checkpointed papers and records the others even if one fails."""
+        mocker.patch("engpapersumm.summarizer.list_pdfs",
+                     return_value=[Path("done.pdf"), Path("bad.pdf"), Path("good.pdf")])
+        mocker.patch("engpapersumm.summarizer.pdf_sha256", side_effect=lambda pdf_path: pdf_path.stem)
+        done_summary = tmp_path / "done-summary.pdf"
+        done_summary.touch()
+        (tmp_path / ".engpapersumm_ckpt.jsonl").write_text(f'{{"sha": "done", "out": "{done_summary}"}}\n')
+        
+        async def fake_summarize(pdf_path, output_dir, extraction=None, sha=None):
+            if pdf_path.stem == "bad":
+                raise RuntimeError("boom")
+            out_file = output_dir / f"{pdf_path.stem}-summary.pdf"
+            out_file.touch()
+            return out_file
+        summarizer = PaperSummarizer(config=TEST_CONFIG)
+        summarizer.summarize_file_async = AsyncMock(side_effect=fake_summarize)
+        
+        with pytest.raises(RuntimeError):
+            asyncio.run(summarizer.summarize_directory_async(Path("./papers"), tmp_path))
+        assert [call.args[0] for call in summarizer.summarize_file_async.await_args_list] == [
+            Path("bad.pdf"), Path("good.pdf")
+        ]
+        
+        # The rerun only retries the paper that failed
+        summarizer.summarize_file_async.reset_mock()
+        with pytest.raises(RuntimeError):
+            asyncio.run(summarizer.summarize_directory_async(Path("./papers"), tmp_path))
+        assert [call.args[0] for call in summarizer.summarize_file_async.await_args_list] == [Path("bad.pdf")]
+    
+    def test_worker_failure_keeps_other_results(self, mocker, tmp_path):
+        """Test that a paper failing in a worker does not stop the others from being recorded."""
+        # Threads stand in for the worker processes, which could not see the mocks
+        mocker.patch("engpapersumm.summarizer.ProcessPoolExecutor", ThreadPoolExecutor)
+        mocker.patch("engpapersumm.summarizer.list_pdfs",
+                     return_value=[Path("bad.pdf"), Path("good1.pdf"), Path("good2.pdf")])
+        mocker.patch("engpapersumm.summarizer.pdf_sha256", side_effect=lambda pdf_path: pdf_path.stem)
+        
+        def fake_worker(pdf_path, output_dir):
+            if pdf_path.stem == "bad":
+                raise RuntimeError("boom")
+            out_file = output_dir / f"{pdf_path.stem}-summary.pdf"
+            out_file.touch()
+            return out_file
+        mocker.patch("engpapersumm.summarizer._summarize_in_worker", side_effect=fake_worker)
+        
+        summarizer = PaperSummarizer(config={**TEST_CONFIG, "MAX_WORKERS": 2})
+        with pytest.raises(RuntimeError):
+            summarizer.summarize_directory(Path("./papers"), tmp_path)
+        
+        checkpoint = (tmp_path / ".engpapersumm_ckpt.jsonl").read_text()
+        assert '"sha": "good1"' in checkpoint and '"sha": "good2"' in checkpoint
+        assert '"sha": "bad"' not in checkpoint
+    
+    def test_worker_extracts_sequentially(self, file_mocks, mocker, tmp_path):
+        """Test that papers summarized in a worker process do not start a page-extraction pool of their own."""
+        from engpapersumm import summarizer as summarizer_module
+        file_mocks["extract_text_and_title"].side_effect = lambda pdf_path, **kwargs: ("text", "Title")
+        file_mocks["extract_paper_topic_async"].return_value = {"sample": 1.0}
+        file_mocks["generate_key_takeaways_async"].return_value = "Key takeaways"
+        file_mocks["generate_engineers_corner_async"].return_value = "Engineers corner"
+    
+        mocker.patch.object(summarizer_module, "_worker_summarizer", None)  # Reset after the test
+        summarizer_module._init_worker(TEST_CONFIG)
+        summarizer_module._worker_summarizer._hierarchical_summarize_async = AsyncMock(return_value="Summary")
+        summarizer_module._summarize_in_worker(Path("test.pdf"), tmp_path)
+    
+        assert file_mocks["extract_text_and_title"].call_args.kwargs["max_workers"] == 1
+    
+    @patch("engpapersumm.summarizer.list_pdfs")
+    @patch("engpapersumm.summarizer.pdf_sha256", side_effect=lambda pdf_path: pdf_path.stem)
+    def test_large_directories_use_batch_api(self, mock_hash, mock_list_pdfs, tmp_path):
+        """Test that directories reaching BATCH_API_THRESHOLD are sent as one batch job."""
+        summarizer = PaperSummarizer(config={**TEST_CONFIG, "BATCH_API_THRESHOLD": 10})
+        summarizer._summarize_files_batch = MagicMock(side_effect=lambda pdf_files, output_dir: [
+            output_dir / f"{pdf_path.stem}-summary.pdf" for pdf_path in pdf_files
+        ])
+        summarizer.summarize_file_async = AsyncMock(return_value=Path("out.pdf"))
+        output_dir = tmp_path
+        
+        mock_list_pdfs.return_value = [Path(f"paper{i}.pdf") for i in range(12)]
+        results = summarizer.summarize_directory(Path("./papers"), output_dir)
+        
+        summarizer._summarize_files_batch.assert_called_once_with(mock_list_pdfs.return_value, output_dir)
+        assert results[-1] == output_dir / "paper11-summary.pdf"
+        summarizer.summarize_file_async.assert_not_awaited()
+        
+        mock_list_pdfs.return_value = [Path(f"paper{i}.pdf") for i in range(3)]
+        assert summarizer.summarize_directory(Path("./papers"), output_dir) == [Path("out.pdf")] * 3
+        assert summarizer._summarize_files_batch.call_count == 1
+    
+    @patch("engpapersumm.summarizer.list_pdfs")
+    @patch("engpapersumm.summarizer.pdf_sha256", side_effect=lambda pdf_path: pdf_path.stem)
+    def test_large_directories_use_batch_api_async(self, mock_hash, mock_list_pdfs, tmp_path):
+        """Test that async directory runs reaching BATCH_API_THRESHOLD are sent as one batch job and recorded."""
+        summarizer = PaperSummarizer(config={**TEST_CONFIG, "BATCH_API_THRESHOLD": 10})
+        
+        def fake_batch(pdf_files, output_dir):
+            out_files = [output_dir / f"{pdf_path.stem}-summary.pdf" for pdf_path in pdf_files]
+            for out_file in out_files:
+                out_file.touch()
+            return out_files
+        summarizer._summarize_files_batch = MagicMock(side_effect=fake_batch)
+        summarizer.summarize_file_async = AsyncMock(return_value=Path("out.pdf"))
+        output_dir = tmp_path
+        
+        mock_list_pdfs.return_value = [Path(f"paper{i}.pdf") for i in range(12)]
+        results = asyncio.run(summarizer.summarize_directory_async(Path("./papers"), output_dir))
+        
+        summarizer._summarize_files_batch.assert_called_once_with(mock_list_pdfs.return_value, output_dir)
+        assert results[-1] == output_dir / "paper11-summary.pdf"
+        summarizer.summarize_file_async.assert_not_awaited()
+        
+        # A rerun finds every paper in the checkpoint
+        assert asyncio.run(summarizer.summarize_directory_async(Path("./papers"), output_dir)) == results
+        assert summarizer._summarize_files_batch.call_count == 1
+    
+    @patch("engpapersumm.summarizer.map_summarize_section_async", new_callable=AsyncMock)
+    @patch("engpapersumm.summarizer.batch_summarize_sections_async", new_callable=AsyncMock)
+    def test_map_sections_batches_small_papers(self, mock_batch, mock_map):
+        """Test that sections within the token budget share one request, falling back on failure."""
+        sections = [{'title': f"Section {i}", 'content': f"text {i}"} for i in range(3)]
+        mock_batch.return_value = [{'title': s['title'], 'content': "summary"} for s in sections]
+        summarizer = PaperSummarizer(config=TEST_CONFIG)
+        
+        assert asyncio.run(summarizer._map_sections(sections)) == mock_batch.return_value
+        mock_map.assert_not_awaited()
+        
+        mock_batch.side_effect = ValueError("expected 3 summaries, got 2")
+        mock_map.side_effect = lambda client, section, model, semaphore: section
+        assert asyncio.run(summarizer._map_sections(sections)) == sections
+        assert mock_map.await_count == 3
+    
+    def test_identical_papers_share_one_run(self, tmp_path):
+        """Test that concurrent requests for the same paper content are summarized once."""
+        first, copy = tmp_path / "paper.pdf", tmp_path / "paper-copy.pdf"
+        first.write_bytes(b"%PDF same content")
+        copy.write_bytes(b"%PDF same content")
+        
+        summarizer = PaperSummarizer(config=TEST_CONFIG)
+        
+        async def fake_summarize(pdf_path, output_dir, extraction=None, sha=None):
+            await asyncio.sleep(0.01)
+            return output_dir / "summary.pdf"
+        summarizer._summarize_pdf_async = AsyncMock(side_effect=fake_summarize)
+        
+        async def summarize_all():
+            return await asyncio.gather(
+                summarizer.summarize_file_async(first, tmp_path),
+                summarizer.summarize_file_async(copy, tmp_path),
+                summarizer.summarize_file_async(copy, tmp_path / "elsewhere")
+            )
+        results = asyncio.run(summarize_all())
+        
+        assert summarizer._summarize_pdf_async.await_count == 2  # Once per output directory
+        assert results == [tmp_path / "summary.pdf"] * 2 + [tmp_path / "elsewhere" / "summary.pdf"]
+    
+    @patch("engpapersumm.summarizer.map_summarize_section_async", new_callable=AsyncMock)
+    @patch("engpapersumm.summarizer.batch_summarize_sections_async", new_callable=AsyncMock)
+    def test_map_sections_groups_large_papers(self, mock_batch, mock_map):
+        """Test that sections are batched CHUNKS_PER_REQUEST at a time and a lone section is sent alone."""
+        sections = [{'title': f"Section {i}", 'content': f"text {i}"} for i in range(5)]
+        mock_batch.side_effect = lambda client, group, model: [dict(s, content="batched") for s in group]
+        mock_map.side_effect = lambda client, section, model, semaphore: dict(section, content="single")
+        summarizer = PaperSummarizer(config={**TEST_CONFIG, "CHUNKS_PER_REQUEST": 2})
+        
+        results = asyncio.run(summarizer._map_sections(sections))
+        
+        assert [[s['title'] for s in call.args[1]] for call in mock_batch.await_args_list] == [
+            ["Section 0", "Section 1"], ["Section 2", "Section 3"]
+        ]
+        assert [r['title'] for r in results] == [s['title'] for s in sections]
+        assert [r['content'] for r in results] == ["batched"] * 4 + ["single"]
+    
+    @patch("engpapersumm.summarizer.list_pdfs")
+    @patch("engpapersumm.summarizer.pdf_sha256", side_effect=lambda pdf_path: pdf_path.stem)
+    def test_summarize_directory_async(self, mock_hash, mock_list_pdfs, tmp_path):
+        """Test summarizing a directory of files concurrently."""
+        mock_list_pdfs.return_value = [Path("test1.pdf"), Path("test2.pdf"), Path("test3.pdf")]
+        
+        summarizer = PaperSummarizer(config={**TEST_CONFIG, "MAX_CONCURRENT_PAPERS": 2})
+        in_flight = []
+        
+        async def fake_summarize(pdf_path, output_dir, extraction=None, sha=None):
+            in_flight.append(pdf_path)
+            assert len(in_flight) <= 2
+            await asyncio.sleep(0.01)
+            in_flight.remove(pdf_path)
+            return output_dir / f"{pdf_path.stem}-summary.pdf"
+        summarizer.summarize_file_async = AsyncMock(side_effect=fake_summarize)
+        
+        output_dir = tmp_path
+        results = asyncio.run(summarizer.summarize_directory_async(Path("./papers"), output_dir))
+        
+        assert summarizer.summarize_file_async.await_count == 3
+        assert results == [output_dir / f"test{i}-summary.pdf" for i in (1, 2, 3)]
+    
+    def test_directory_extraction_runs_in_workers(self, mocker, tmp_path):
+        """Test that papers are parsed ahead in the worker pool and handed to their summaries."""
+        # Threads stand in for the worker processes, which could not see the mocks
+        mocker.patch("engpapersumm.summarizer.ProcessPoolExecutor", ThreadPoolExecutor)
+        mocker.patch("engpapersumm.summarizer.list_pdfs",
+                     return_value=[Path(f"test{i}.pdf") for i in range(1, 6)])
+        mocker.patch("engpapersumm.summarizer.pdf_sha256", side_effect=lambda pdf_path: pdf_path.stem)
+        mock_extract = mocker.patch("engpapersumm.summarizer.extract_text_and_title",
+                                    side_effect=lambda pdf_path, max_workers: ("text", pdf_path.stem))
+        
+        summarizer = PaperSummarizer(config={**TEST_CONFIG, "MAX_WORKERS": 2, "MAX_CONCURRENT_PAPERS": 1})
+        
+        async def fake_summarize(pdf_path, output_dir, extraction=None, sha=None):
+            text, title = await extraction
+            return output_dir / f"{title}-summary.pdf"
+        summarizer.summarize_file_async = AsyncMock(side_effect=fake_summarize)
+        
+        output_dir = tmp_path
+        results = asyncio.run(summarizer.summarize_directory_async(Path("./papers"), output_dir))
+        
+        assert results == [output_dir / f"test{i}-summary.pdf" for i in range(1, 6)]
+        assert mock_extract.call_count == 5
+        assert all(call.kwargs == {"max_workers": 1} for call in mock_extract.call_args_list)
+    
+    @patch("engpapersumm.summarizer.list_pdfs")
+    @patch("engpapersumm.summarizer.pdf_sha256")
+    @patch("engpapersumm.summarizer.extract_text_and_title")
+    @patch("engpapersumm.summarizer.run_batch")
+    @patch("engpapersumm.summarizer.map_summarize_section_async", new_callable=AsyncMock)
+    @patch("engpapersumm.summarizer.reduce_summarize_async", new_callable=AsyncMock)
+    def test_summarize_directory_batch(self, mock_reduce, mock_map, mock_run_batch, mock_extract,
+                                       mock_hash, mock_list_pdfs):
+        """Test that all papers go out in one batch and missing replies are requested interactively."""
+        mock_list_pdfs.return_value = [Path("a.pdf"), Path("b.pdf"), Path("a-copy.pdf")]
+        mock_hash.side_effect = lambda pdf_path: pdf_path.stem[0]
+        mock_extract.side_effect = lambda pdf_path: ("text", pdf_path.stem)
+        mock_map.return_value = {'title': "Results", 'content': "interactive summary"}
+        mock_reduce.return_value = "final summary"
+        mock_run_batch.side_effect = lambda client, requests, poll: {
+            **dict.fromkeys(requests, "batched reply"), "b:1": None
+        }
+        
+        summarizer = PaperSummarizer(config=TEST_CONFIG)
+        summarizer._prepare_sections_async = AsyncMock(return_value=[
+            {'title': "Introduction", 'content': "intro"}, {'title': "Results", 'content': "results"}
+        ])
+        summarizer._write_summary = MagicMock(side_effect=lambda out, title, *args: out / f"{title}.pdf")
+        
+        output_dir = Path("./output")
+        results = summarizer.summarize_directory_batch(Path("./papers"), output_dir)
+        
+        assert mock_run_batch.call_count == 1
+        requests = mock_run_batch.call_args.args[1]
+        assert sorted(requests) == ["a:0", "a:1", "a:engineers_corner", "a:takeaways",
+                                    "b:0", "b:1", "b:engineers_corner", "b:takeaways"]
+        assert mock_map.await_count == 1
+        assert mock_reduce.await_args_list[1].args[1] == [
+            {'title': "Introduction", 'content': "batched reply"}, mock_map.return_value
+        ]
+        assert results == [output_dir / "a.pdf", output_dir / "b.pdf", output_dir / "a.pdf"]
+    
+    @patch("engpapersumm.summarizer.map_summarize_section_async")
+    def test_map_sections_keeps_order(self, mock_map):
+        """Test that concurrent section summaries come back in paper order."""
+        async def fake_map(client, section, model, semaphore):
+            async with semaphore:
+                return {'title': section['title'], 'content': section['content'].upper()}
+        mock_map.side_effect = fake_map
+        
+        summarizer = PaperSummarizer(config={**TEST_CONFIG, "MAX_CONCURRENT_REQUESTS": 2, "MAP_BATCH_TOKENS": 0})
+        sections = [{'title': f"Section {i}", 'content': f"text {i}"} for i in range(5)]
+        results = asyncio.run(summarizer._map_sections(sections))
+        
+        assert mock_map.call_count == 5
+        assert [r['title'] for r in results] == [s['title'] for s in sections]
+        assert results[3]['content'] == "TEXT 3"
+    
+    @patch("engpapersumm.summarizer.reduce_summarize_async", new_callable=AsyncMock)
+    @patch("engpapersumm.summarizer.perform_topic_modeling_async", new_callable=AsyncMock)
+    @patch("engpapersumm.summarizer.validate_content_against_title_async", new_callable=AsyncMock)
+    @patch("engpapersumm.summarizer.extract_paper_topic_async", new_callable=AsyncMock)
+    def test_hierarchical_summarize_pipeline(self, mock_topic, mock_validate, mock_modeling, mock_reduce):
+        """Test the pipeline stages are chained on one event loop."""
+        intro = "Caching attention keys speeds up transformer inference. " * 30
+        results = "Transformer inference throughput doubles when caching is enabled on GPUs. " * 30
+        text = f"Paper\n\n1. Introduction\n{intro}\n\n2. Results\n{results}"
+        mock_topic.return_value = {"caching": 1.0, "transformer inference": 0.8}
+        mock_validate.side_effect = lambda client, title, sections, model, **kwargs: sections
+        mock_modeling.return_value = [["caching", "inference"]]
+        mock_reduce.return_value = "Final summary"
+        
+        summarizer = PaperSummarizer(config={**TEST_CONFIG, "MIN_SIMILARITY": 0.0})
+        summarizer._map_sections = AsyncMock(side_effect=lambda sections: sections)
+        result = asyncio.run(summarizer._hierarchical_summarize_async(text, "Caching"))
+        
+        assert result == "Final summary"
+        mock_topic.assert_awaited_once()
+        assert mock_topic.await_args.args[3] == "gpt-4o-mini"  # Scoring calls use the cheaper model
+        mapped = summarizer._map_sections.await_args.args[0]
+        assert [s['title'] for s in mapped] == ["Introduction", "Results"]
+        assert mapped[0]['topic_guidance'] == "Focus on these key topics: caching, inference"
+    
+    def test_generate_content_detects_sections_once(self, file_mocks, mocker):
+        """Test that the excerpt and the map-reduce pipeline share one section detection."""
+        from engpapersumm.extractors.section import detect_sections
+        detected = []
+        mock_detect = mocker.patch("engpapersumm.summarizer.detect_sections",
+                                   side_effect=lambda *args: detected.append(detect_sections(*args)) or detected[-1])
+        file_mocks["generate_key_takeaways_async"].return_value = "Key takeaways"
+        file_mocks["generate_engineers_corner_async"].return_value = "Engineers corner"
+    
+        summarizer = PaperSummarizer(config=TEST_CONFIG)
+        summarizer._prepare_sections_async = AsyncMock(return_value=[])
+        summarizer._map_sections = AsyncMock(return_value=[])
+        mocker.patch("engpapersumm.summarizer.reduce_summarize_async", new_callable=AsyncMock,
+                     return_value="Summary")
+        text = "Paper\n\n1. Introduction\n" + "Caching speeds up inference. " * 100
+        result = asyncio.run(summarizer._generate_content(text, "Caching"))
+    
+        assert result == ["Summary", "Key takeaways", "Engineers corner"]
+        assert mock_detect.call_count == 1
+        assert summarizer._prepare_sections_async.await_args.args[3] is detected[0]
+    
+    def test_async_client_reused_across_files(self):
+        """Test that successive sync runs share one event loop and async client."""
+        summarizer = PaperSummarizer(config=TEST_CONFIG)
+        
+        async def current_client():
+            return summarizer.aclient
+        
+        assert summarizer._run(current_client()) is summarizer._run(current_client())
+    
+    def test_shared_http_client(self, tmp_path):
+        """Test that summarizers with the same settings share one async client and HTTP/2 pool per loop."""
+        a = PaperSummarizer(config=TEST_CONFIG)
+        b = PaperSummarizer(config=TEST_CONFIG)
+        c = PaperSummarizer(config={**TEST_CONFIG, "CACHE_DIR": str(tmp_path)})
+        
+        async def clients():
+            return a.aclient, b.aclient, c.aclient
+        
+        first, second, other = asyncio.run(clients())
+        assert first is second and first._client is second._client
+        assert other is not first
+        assert a.rate_limiter is b.rate_limiter
+        assert asyncio.run(clients())[0] is not first  # A new loop opens its own connections
+    
+    def test_cache_hit(self, tmp_path):
+        """Test that repeating an identical LLM request is answered from the response cache."""
+        calls = []
+        
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, json={
+                "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Takeaways"}}]
+            })
+        
+        with patch("engpapersumm.summarizer.httpx.AsyncHTTPTransport", lambda **kwargs: httpx.MockTransport(handler)):
+            summarizer = PaperSummarizer(config={**TEST_CONFIG, "CACHE_DIR": str(tmp_path)})
+            assert isinstance(summarizer.cache, diskcache.Cache)
+            
+            async def takeaways():
+                return await generate_key_takeaways_async(summarizer.aclient, "Excerpt", "Title", "gpt-4o")
+            
+            assert summarizer._run(takeaways()) == "Takeaways"
+            assert summarizer._run(takeaways()) == "Takeaways"
+        
+        assert len(calls) == 1
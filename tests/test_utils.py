@@ -0,0 +1,379 @@
+"""Test text and token utilities."""
+
+import asyncio
+import httpx
+import json
+import math
+import pytest
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+from openai import AsyncOpenAI, AuthenticationError, OpenAI, RateLimitError
+from tenacity import wait_none
+from engpapersumm.utils import batch, llm, llm_cache, rate_limit, tokens
+
+def _api_error(error_class, status_code):
+    """Build an OpenAI API error for the given HTTP status."""
+    response = httpx.Response(status_code, request=httpx.Request("POST", "https://api.openai.com/v1"))
+    return error_class("error", response=response, body=None)
+
+class TestTokens:
+    """Tests for token budgeting helpers."""
+    
+    @pytest.fixture(autouse=True)
+    def approximate_encoding(self):
+        """Use the offline approximation so tests do not download tiktoken data."""
+        with patch.object(tokens, "get_encoding", return_value=tokens._ApproximateEncoding()):
+            yield
+    
+    def test_count_tokens(self):
+        """Test tokens are counted with the model's encoding."""
+        assert tokens.count_tokens("abcdefghij", "gpt-4o") == 3
+    
+    def test_truncate_to_tokens(self):
+        """Test text is cut to the token budget."""
+        assert tokens.truncate_to_tokens("abcdefghij", 2, "gpt-4o") == "abcdefgh"
+    
+    def test_single_token_ids_need_real_encoding(self):
+        """Test token ids are unavailable when counts are only approximated."""
+        assert tokens.single_token_ids(["0", "1"], "gpt-4o") is None
+    
+    def test_truncate_within_budget(self):
+        """Test text within the budget is returned unchanged."""
+        assert tokens.truncate_to_tokens("abcdefghij", 3, "gpt-4o") == "abcdefghij"
+    
+    def test_token_chunking(self):
+        """Test text is split into ceil(N / max_tokens) chunks, each after the first overlapping the previous one."""
+        text = "".join(f"{i:04d}" for i in range(1000))  # 1000 tokens of 4 characters
+        
+        chunks = tokens.split_by_tokens(text, 300, "gpt-4o", overlap=10)
+        
+        assert len(chunks) == math.ceil(1000 / 300)
+        assert chunks[0] == text[:1200]
+        assert chunks[1] == text[1160:2400]
+        assert chunks[-1].endswith("0999")
+
+class TestChatCompletion:
+    """Tests for the retrying chat completion helpers."""
+    
+    @pytest.fixture(autouse=True)
+    def no_backoff(self):
+        """Retry immediately so tests do not sleep."""
+        with patch.object(llm.chat_completion.retry, "wait", wait_none()), \
+             patch.object(llm.chat_completion_async.retry, "wait", wait_none()):
+            yield
+    
+    def test_retries_rate_limits(self):
+        """Test rate-limited requests are retried until they succeed."""
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            _api_error(RateLimitError, 429), _api_error(RateLimitError, 429), "response"
+        ]
+        assert llm.chat_completion(client, model="gpt-4o", messages=[]) == "response"
+        assert client.chat.completions.create.call_count == 3
+    
+    def test_gives_up_after_max_attempts(self):
+        """Test the original error is raised once the attempts are exhausted."""
+        client = MagicMock()
+        client.chat.completions.create.side_effect = _api_error(RateLimitError, 429)
+        with pytest.raises(RateLimitError):
+            llm.chat_completion(client, model="gpt-4o", messages=[])
+        assert client.chat.completions.create.call_count == 6
+    
+    def test_does_not_retry_client_errors(self):
+        """Test non-transient errors are raised immediately."""
+        client = MagicMock()
+        client.chat.completions.create.side_effect = _api_error(AuthenticationError, 401)
+        with pytest.raises(AuthenticationError):
+            llm.chat_completion(client, model="gpt-4o", messages=[])
+        assert client.chat.completions.create.call_count == 1
+    
+    def test_async_retries_rate_limits(self):
+        """Test the async helper retries rate-limited requests."""
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(side_effect=[_api_error(RateLimitError, 429), "response"])
+        assert asyncio.run(llm.chat_completion_async(client, model="gpt-4o", messages=[])) == "response"
+        assert client.chat.completions.create.await_count == 2
+
+def _stream_handler(calls, deltas):
+    """Mock API handler streaming deltas as one chat completion, timing out on the first call."""
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ReadTimeout("stalled", request=request)
+        events = [
+            {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o",
+             "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+            for delta in deltas
+        ]
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=body.encode(), headers={"content-type": "text/event-stream"})
+    return handler
+
+class TestStreamChatCompletion:
+    """Tests for the streaming chat completion helpers."""
+    
+    @pytest.fixture(autouse=True)
+    def no_backoff(self):
+        """Retry immediately so tests do not sleep."""
+        with patch.object(llm.stream_chat_completion.retry, "wait", wait_none()), \
+             patch.object(llm.stream_chat_completion_async.retry, "wait", wait_none()):
+            yield
+    
+    def test_stalled_stream_is_retried(self):
+        """Test that a stream timing out between chunks is retried and the reply is joined."""
+        calls = []
+        client = OpenAI(api_key="sk-test", max_retries=0, http_client=httpx.Client(
+            transport=httpx.MockTransport(_stream_handler(calls, ["Hello", " world"]))
+        ))
+        
+        assert llm.stream_chat_completion(client, model="gpt-4o", messages=[]) == "Hello world"
+        assert len(calls) == 2
+        assert json.loads(calls[1].content)["stream"] is True
+        assert calls[1].extensions["timeout"]["read"] == llm.STREAM_STALL_TIMEOUT
+    
+    def test_repeating_reply_is_cut(self):
+        """Test that a reply stuck in a loop is cut after its first repetition."""
+        loop = "The cache hit rate improves as the batch size grows. "
+        calls = []
+        client = AsyncOpenAI(api_key="sk-test", max_retries=0, http_client=httpx.AsyncClient(
+            transport=httpx.MockTransport(_stream_handler(calls, ["Summary. "] + [loop] * 10))
+        ))
+        
+        reply = asyncio.run(llm.stream_chat_completion_async(client, model="gpt-4o", messages=[]))
+        
+        assert reply == "Summary. " + loop
+    
+    def test_long_reply_is_checked_in_steps(self):
+        """Test that a long reply is rescanned for repetition every few hundred characters, not on every delta."""
+        deltas = [f"word{i} " for i in range(1000)]
+        client = OpenAI(api_key="sk-test", max_retries=0, http_client=httpx.Client(
+            transport=httpx.MockTransport(_stream_handler([], deltas))
+        ))
+        
+        with patch.object(llm, "_cut_repetition", wraps=llm._cut_repetition) as mock_cut:
+            reply = llm.stream_chat_completion(client, model="gpt-4o", messages=[])
+        
+        assert reply == "".join(deltas)
+        assert mock_cut.call_count <= len(reply) // llm._REPEAT_CHECK_CHARS
+
+def _completion_handler(calls):
+    """Mock API handler answering chat completions and recording each request."""
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={
+            "id": f"chatcmpl-{len(calls)}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"answer {len(calls)}"}}]
+        })
+    return handler
+
+class TestLlmCache:
+    """Tests for the response-caching transports."""
+    
+    def test_repeated_request_is_served_from_cache(self, tmp_path):
+        """Test an identical request is answered without reaching the API."""
+        calls = []
+        transport = llm_cache.CachingTransport(httpx.MockTransport(_completion_handler(calls)),
+                                               llm_cache.open_cache(str(tmp_path)))
+        client = OpenAI(api_key="test", base_url="https://api.test/v1", http_client=httpx.Client(transport=transport))
+        
+        first = llm.chat_completion(client, model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        second = llm.chat_completion(client, model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        other = llm.chat_completion(client, model="gpt-4o", messages=[{"role": "user", "content": "bye"}])
+        
+        assert len(calls) == 2
+        assert first.choices[0].message.content == second.choices[0].message.content == "answer 1"
+        assert other.choices[0].message.content == "answer 2"
+    
+    def test_cache_persists_across_clients(self, tmp_path):
+        """Test responses cached by one client are reused by an async client on a later run."""
+        calls = []
+        messages = [{"role": "user", "content": "hi"}]
+        sync_transport = llm_cache.CachingTransport(httpx.MockTransport(_completion_handler(calls)),
+                                                    llm_cache.open_cache(str(tmp_path)))
+        client = OpenAI(api_key="test", base_url="https://api.test/v1", http_client=httpx.Client(transport=sync_transport))
+        llm.chat_completion(client, model="gpt-4o", messages=messages)
+        
+        async_transport = llm_cache.AsyncCachingTransport(httpx.MockTransport(_completion_handler(calls)),
+                                                          llm_cache.open_cache(str(tmp_path)))
+        aclient = AsyncOpenAI(api_key="test", base_url="https://api.test/v1",
+                              http_client=httpx.AsyncClient(transport=async_transport))
+        response = asyncio.run(llm.chat_completion_async(aclient, model="gpt-4o", messages=messages))
+        
+        assert len(calls) == 1
+        assert response.choices[0].message.content == "answer 1"
+    
+    def test_expired_responses_are_requested_again(self, tmp_path):
+        """Test a cached response is only reused until its expiry."""
+        calls = []
+        transport = llm_cache.CachingTransport(httpx.MockTransport(_completion_handler(calls)),
+                                               llm_cache.open_cache(str(tmp_path)), expire=0.05)
+        client = OpenAI(api_key="test", base_url="https://api.test/v1", http_client=httpx.Client(transport=transport))
+        messages = [{"role": "user", "content": "hi"}]
+
+        llm.chat_completion(client, model="gpt-4o", messages=messages)
+        llm.chat_completion(client, model="gpt-4o", messages=messages)
+        time.sleep(0.1)
+        llm.chat_completion(client, model="gpt-4o", messages=messages)
+
+        assert len(calls) == 2
+
+    def test_errors_are_not_cached(self, tmp_path):
+        """Test failed requests are sent again."""
+        calls = []
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(400, json={"error": {"message": "bad request"}})
+        transport = llm_cache.CachingTransport(httpx.MockTransport(handler), llm_cache.open_cache(str(tmp_path)))
+        client = OpenAI(api_key="test", base_url="https://api.test/v1", max_retries=0,
+                        http_client=httpx.Client(transport=transport))
+        
+        for _ in range(2):
+            with pytest.raises(Exception):
+                llm.chat_completion(client, model="gpt-4o", messages=[])
+        assert len(calls) == 2
+
+    def test_streams_pass_through_and_cache_once_complete(self, tmp_path):
+        """Test a streamed reply reaches the caller chunk by chunk and is only cached if read to the end."""
+        pulled = []
+        
+        def handler(request):
+            def chunks():
+                for i in range(200):
+                    pulled.append(i)
+                    yield f"data: chunk {i}\n\n".encode()
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=chunks())
+        transport = llm_cache.CachingTransport(httpx.MockTransport(handler), llm_cache.open_cache(str(tmp_path)))
+        client = httpx.Client(transport=transport)
+        request = client.build_request("POST", "https://api.test/v1/chat/completions", json={"stream": True})
+        
+        # A caller closing the stream early stops pulling from the API and caches nothing
+        response = client.send(request, stream=True)
+        next(response.iter_bytes())
+        response.close()
+        assert len(pulled) < 10
+        
+        pulled.clear()
+        assert client.send(request).text.count("data:") == 200
+        assert client.send(request).text.count("data:") == 200
+        assert len(pulled) == 200  # The second full read was served from the cache
+    
+    def test_completed_sdk_streams_are_cached(self, tmp_path):
+        """Test a stream the SDK read up to its end event is replayed from the cache, uncompressed."""
+        calls = []
+        
+        def handler(request):
+            calls.append(request.headers["accept-encoding"])
+            events = [{"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o",
+                       "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]}
+                      for word in ("Hello", " world")]
+            body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body.encode())
+        transport = llm_cache.CachingTransport(httpx.MockTransport(handler), llm_cache.open_cache(str(tmp_path)))
+        client = OpenAI(api_key="test", base_url="https://api.test/v1", http_client=httpx.Client(transport=transport))
+        
+        for _ in range(2):
+            assert llm.stream_chat_completion(client, model="gpt-4o", messages=[]) == "Hello world"
+        assert calls == ["identity"]
+    
+    def test_async_streams_pass_through(self, tmp_path):
+        """Test the async transport also hands the stream over before reading it to the end."""
+        pulled = []
+        
+        def handler(request):
+            async def chunks():
+                for i in range(200):
+                    pulled.append(i)
+                    yield f"data: chunk {i}\n\n".encode()
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=chunks())
+        transport = llm_cache.AsyncCachingTransport(httpx.MockTransport(handler), llm_cache.open_cache(str(tmp_path)))
+        
+        async def read_first_chunk():
+            async with httpx.AsyncClient(transport=transport) as client:
+                request = client.build_request("POST", "https://api.test/v1/chat/completions", json={"stream": True})
+                response = await client.send(request, stream=True)
+                await response.aiter_bytes().__anext__()
+                await response.aclose()
+        
+        asyncio.run(read_first_chunk())
+        assert len(pulled) < 10
+        assert len(llm_cache.open_cache(str(tmp_path))) == 0
+
+class TestBatch:
+    """Tests for running requests through the Batch API."""
+    
+    def test_run_batch_collects_replies(self):
+        """Test that replies are keyed by custom_id and failed requests map to None."""
+        output = "\n".join([
+            json.dumps({"custom_id": "a", "response": {"status_code": 200, "body": {
+                "choices": [{"message": {"content": " summary of a "}}]
+            }}}),
+            json.dumps({"custom_id": "b", "response": {"status_code": 500, "body": {}}}),
+        ])
+        client = MagicMock()
+        client.batches.create.return_value = MagicMock(id="batch_1", status="in_progress")
+        client.batches.retrieve.return_value = MagicMock(id="batch_1", status="completed", output_file_id="file_out")
+        client.files.content.return_value.text = output
+        requests = {"a": {"model": "gpt-4o"}, "b": {"model": "gpt-4o"}, "c": {"model": "gpt-4o"}}
+        
+        assert batch.run_batch(client, requests, poll_interval=0) == {"a": "summary of a", "b": None, "c": None}
+        
+        upload = client.files.create.call_args.kwargs
+        assert upload["purpose"] == "batch"
+        lines = [json.loads(line) for line in upload["file"][1].decode().splitlines()]
+        assert [line["custom_id"] for line in lines] == ["a", "b", "c"]
+        assert lines[0]["url"] == batch.BATCH_ENDPOINT
+        assert client.batches.create.call_args.kwargs["completion_window"] == "24h"
+    
+    def test_polling_survives_transient_errors(self):
+        """Test that a dropped connection while polling is retried instead of losing the batch."""
+        client = MagicMock()
+        client.batches.create.return_value = MagicMock(id="batch_1", status="in_progress")
+        client.batches.retrieve.side_effect = [
+            _api_error(RateLimitError, 429),
+            MagicMock(id="batch_1", status="completed", output_file_id=None)
+        ]
+        
+        with patch.object(batch._call.retry, "wait", wait_none()):
+            assert batch.run_batch(client, {"a": {"model": "gpt-4o"}}, poll_interval=0) == {"a": None}
+        assert client.batches.retrieve.call_count == 2
+        client.batches.create.assert_called_once()
+
+class TestRateLimit:
+    """Tests for throttling requests with the reported rate-limit headroom."""
+    
+    def test_parse_reset(self):
+        """Test the reset durations used by the API headers."""
+        assert rate_limit.parse_reset("20ms") == pytest.approx(0.02)
+        assert rate_limit.parse_reset("6m0s") == 360.0
+        assert rate_limit.parse_reset("1.5s") == 1.5
+    
+    def test_waits_for_exhausted_limit_to_reset(self):
+        """Test that a request is held back until the reported limit resets."""
+        sent = []
+        
+        def handler(request):
+            sent.append(time.monotonic())
+            return httpx.Response(200, json={}, headers={
+                "x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "200ms",
+                "x-ratelimit-remaining-tokens": "1000000", "x-ratelimit-reset-tokens": "1ms",
+            })
+        
+        transport = rate_limit.AsyncRateLimitTransport(httpx.MockTransport(handler), rate_limit.RateLimiter())
+        
+        async def send_twice():
+            async with httpx.AsyncClient(transport=transport) as client:
+                for _ in range(2):
+                    await client.post("https://api.openai.com/v1/chat/completions", json={"max_tokens": 10})
+        asyncio.run(send_twice())
+        
+        assert sent[1] - sent[0] >= 0.15
+    
+    def test_token_estimate_includes_max_tokens(self):
+        """Test that the requested output budget counts towards the token estimate."""
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions",
+                                json={"messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 500})
+        assert 600 <= rate_limit.estimate_tokens(request) <= 620